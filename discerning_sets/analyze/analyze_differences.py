@@ -1,6 +1,9 @@
 import pickle
 from pathlib import Path
 
+from discerning_sets.analyze.cooccurrence import occurrence_matrix
+from discerning_sets.canonical import order_rows
+
 """
 This module analyzes differences between consequent elements of the examples subsets for given `n`.
 It sorts the first and second half of the examples separately (with sums n and n + 1 respectively).
@@ -13,7 +16,10 @@ def sort_examples(examples):
     # I.e. {1, 4, 5} -> 10011, those string are sorted lexicographically.
 
     max_i = examples[0][0][-1] // 2  # last element of the first subset
-    return sorted(examples, key=lambda x: [i in x[0] for i in range(1, max_i + 1)])
+    sets = [s for s, *_ in examples]
+    matrix = occurrence_matrix(sets, max(max(s) for s in sets))[:, :max_i]
+
+    return [examples[idx] for idx in order_rows(matrix)]
 
 
 def main():
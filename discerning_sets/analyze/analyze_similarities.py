@@ -1,35 +1,32 @@
 import pickle
-from collections import defaultdict
-from itertools import product
 from pathlib import Path
 
+import numpy as np
+
+from discerning_sets.analyze.cooccurrence import first_halves, occurrence_matrix, similarity
+
 """
 This module analyzes similar occurrences for pair of elements for given n.
 We count example where both or none of X and Y are present and 
 divide it by number of all examples.
+Counts for all pairs come from one matrix product (see `cooccurrence.py`).
 """
 
 
 def get_similarities(n, examples):
 
-    pair_occurrences = defaultdict(int)
-    pair_disoccurrences = defaultdict(int)
-    elements = set()
-
-    for example, *_ in examples:
-        example = example[:(len(example) // 2)]
-        elements.update(example)
+    halves = first_halves(examples)
+    elements = sorted(set(x for half in halves for x in half))
 
-        for i in range(1, n // 2 + 1):
-            for j in range(i + 1, n // 2 + 1):
-                if i in example and j in example:
-                    pair_occurrences[i, j] += 1
-                elif i not in example and j not in example:
-                    pair_disoccurrences[i, j] += 1
+    # only elements up to n / 2 are compared, pairs with larger ones have zero similarity
+    values = similarity(occurrence_matrix(halves, n))
+    values[n // 2:, :] = 0
+    values[:, n // 2:] = 0
 
+    index = np.array(elements) - 1
+    pairs = values[np.ix_(index, index)]
     similarities = {
-        (x, y): (pair_occurrences[x, y] + pair_disoccurrences[x, y]) / len(examples)
-        for x, y in product(elements, elements) if x < y
+        (x, y): float(pairs[a, b]) for a, x in enumerate(elements) for b, y in enumerate(elements) if x < y
     }
 
     print(f'Different similarities values: {sorted(set(similarities.values()))}')
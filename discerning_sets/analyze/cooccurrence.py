@@ -0,0 +1,69 @@
+import numpy as np
+
+"""
+This module counts (co-)occurrences of elements in examples with matrix products.
+Examples are turned into a 0/1 matrix with one row per example, where column x - 1 corresponds to element x.
+For such a matrix M, (M^T M)[x - 1, y - 1] is the number of examples containing both x and y,
+and the rest (co-absences, connection weights) follows from it and the single occurrences.
+"""
+
+
+def occurrence_matrix(sets, n):
+    """
+    0/1 matrix of `sets` of elements from 1..n.
+    """
+    sets = list(sets)
+
+    matrix = np.zeros((len(sets), n), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(sets)), [len(s) for s in sets])
+    columns = np.fromiter((x - 1 for s in sets for x in s), dtype=np.intp, count=len(rows))
+    matrix[rows, columns] = 1
+
+    return matrix
+
+
+def first_halves(examples):
+    """
+    First halves of examples (without the complement making the sum).
+    """
+    return [s[:len(s) // 2] for s, *_ in examples]
+
+
+def cooccurrence(matrix):
+    """
+    Numbers of examples containing both x and y (occurrences of x on the diagonal).
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+
+    return (matrix.T @ matrix).astype(np.int64)
+
+
+def coabsence(matrix, both=None):
+    """
+    Numbers of examples containing neither x nor y.
+    """
+    both = cooccurrence(matrix) if both is None else both
+    single = np.diag(both)
+
+    return len(matrix) - single[:, None] - single[None, :] + both
+
+
+def similarity(matrix):
+    """
+    Ratio of examples containing both or neither of x and y.
+    """
+    both = cooccurrence(matrix)
+
+    return (both + coabsence(matrix, both)) / len(matrix)
+
+
+def jaccard(matrix):
+    """
+    Ratio of examples containing both x and y to examples containing at least one of them
+    (0 if neither of them occurs).
+    """
+    both = cooccurrence(matrix)
+    single = np.diag(both)
+    union = single[:, None] + single[None, :] - both
+
+    return np.divide(both, union, out=np.zeros(both.shape), where=union > 0)
@@ -9,49 +9,114 @@ the question if those constraints may help us significantly decrease computation
 complexity of finding examples if we know them (the constraints) in advance.
 
 For now, the most powerful constraints are for n = 54 (with them, we analyze 2^18 times less subsets).
+
+Similar pairs are always present together and unsimilar pairs never, so elements are grouped by a union-find
+which also keeps the parity of every element relative to the root of its group - similar elements have the same
+parity, unsimilar ones the opposite. A component then splits into a group and its counterpart by parity.
+Pairs contradicting already merged ones are reported as conflicts (x, y, kind) instead of merged.
 """
 
 
+class ParityUnionFind:
+
+    def __init__(self):
+
+        self.parent = {}
+        self.parity = {}
+        self.rank = {}
+
+    def find(self, x):
+        """
+        Root of the component of `x` and parity of `x` relative to it.
+        """
+        if x not in self.parent:
+            self.parent[x], self.parity[x], self.rank[x] = x, 0, 0
+            return x, 0
+
+        path = []
+        while self.parent[x] != x:
+            path.append(x)
+            x = self.parent[x]
+
+        # path compression, parities are accumulated from the root down
+        parity = 0
+        for y in reversed(path):
+            parity ^= self.parity[y]
+            self.parent[y], self.parity[y] = x, parity
+
+        return x, self.parity[path[0]] if path else 0
+
+    def union(self, x, y, opposite):
+        """
+        Merge components of `x` and `y` so that they have the same (or the opposite) parity.
+        Returns False if it contradicts the current state.
+        """
+        x_root, x_parity = self.find(x)
+        y_root, y_parity = self.find(y)
+
+        if x_root == y_root:
+            return x_parity ^ y_parity == opposite
+
+        if self.rank[x_root] < self.rank[y_root]:
+            x_root, y_root = y_root, x_root
+        self.parent[y_root] = x_root
+        self.parity[y_root] = x_parity ^ y_parity ^ opposite
+        if self.rank[x_root] == self.rank[y_root]:
+            self.rank[x_root] += 1
+
+        return True
+
+    def components(self):
+        """
+        Pairs (group, counterpart) of sorted tuples, the group contains the smallest element of the component.
+        """
+        sides = {}
+        for x in sorted(self.parent):
+            root, parity = self.find(x)
+            sides.setdefault(root, ([], []))[parity].append(x)
+
+        return [
+            (tuple(side), tuple(other)) if side[0] == x else (tuple(other), tuple(side))
+            for side, other in sides.values()
+            for x in [min(side + other)]
+        ]
+
+
 def get_constraints(similar, unsimilar):
+    """
+    Returns constraints group -> counterpart (both directions, empty tuple for groups without a counterpart)
+    and a list of conflicts (x, y, 'similar' or 'unsimilar').
+    """
+    union_find = ParityUnionFind()
+    conflicts = []
+
+    for pairs, opposite, kind in [(similar, 0, 'similar'), (unsimilar, 1, 'unsimilar')]:
+        for x, y in pairs:
+            if not union_find.union(x, y, opposite):
+                conflicts.append((x, y, kind))
 
-    groups = []
     constraints = {}
+    for group, counterpart in union_find.components():
+        constraints[group] = counterpart
+        if counterpart:
+            constraints[counterpart] = group
 
-    for x, y in similar:
-        for constr in groups:
-            if x in constr or y in constr:
-                constr.add(x)
-                constr.add(y)
-                break
-        else:
-            groups.append({x, y})
-
-    groups = [tuple(sorted(group)) for group in groups]
-
-    for group in groups:
-        constraints[group] = tuple()
-
-    for x, y in unsimilar:
-        for constr in groups:
-            if x in constr:
-                assert y not in constr
-                x_group = constr
-                break
-        else:
-            x_group = (x, )
-            groups.append(x_group)
-
-        for constr in groups:
-            if y in constr:
-                assert x not in constr
-                y_group = constr
-                break
-        else:
-            y_group = (y, )
-            groups.append(y_group)
-
-        constraints[x_group] = y_group
-        constraints[y_group] = x_group
+    return constraints, conflicts
+
+
+def all_constraints(result):
+    """
+    Constraints for both halves of examples (split as in `main`) for every n with more than 8 examples.
+    Returns dictionary (n, half) -> (constraints, conflicts).
+    """
+    constraints = {}
+    for n, (_, examples, _) in result.items():
+
+        if len(examples) <= 8:
+            continue
+
+        for i, examples_ in enumerate((examples[:len(examples) // 2], examples[len(examples) // 2:])):
+            constraints[n, i] = get_constraints(*get_similarities(n, examples_))
 
     return constraints
 
@@ -61,39 +126,35 @@ def main():
     with Path(f'../data/results_proper_62.pickle').open('rb') as f:
         result = pickle.load(f)
 
-    for n, (_, examples, _) in result.items():
+    for (n, i), (constraints, conflicts) in all_constraints(result).items():
 
-        if len(examples) <= 8:
-            continue
-
-        for i, examples_ in enumerate((examples[:len(examples) // 2], examples[len(examples) // 2:])):
-            similar, unsimilar = get_similarities(n, examples_)
-            constraints = get_constraints(similar, unsimilar)
+        print(f'{n}:{i}')
 
-            print(f'{n}:{i} with {len(examples_)} examples')
+        for x, y, kind in conflicts:
+            print(f'conflict: {kind} pair {x} {y} contradicts previous pairs')
 
-            constraints = {
-                g1: constraints[g1] for g1 in sorted(constraints)
-                if not constraints[g1] or g1[0] < constraints[g1][0]
-            }
-            print(' '.join(map(str, constraints.keys())))
-            print(' '.join(map(str, constraints.values())))
+        constraints = {
+            g1: constraints[g1] for g1 in sorted(constraints)
+            if not constraints[g1] or g1[0] < constraints[g1][0]
+        }
+        print(' '.join(map(str, constraints.keys())))
+        print(' '.join(map(str, constraints.values())))
 
-            print()
+        print()
 
-            max_x = n // 2 if i else n // 2 - 1
+        max_x = n // 2 if i else n // 2 - 1
 
-            combinations = max_x - 1
+        combinations = max_x - 1
 
-            for g1, g2 in constraints.items():
-                combinations -= len(g1) + len(g2) - 1
+        for g1, g2 in constraints.items():
+            combinations -= len(g1) + len(g2) - 1
 
-            print(
-                f'2^{max_x - 1} combinations in total, '
-                f'2^{combinations} with constraints '
-                f'(2^{(max_x - 1) - combinations} times less)'
-            )
-            print('---' * 30)
+        print(
+            f'2^{max_x - 1} combinations in total, '
+            f'2^{combinations} with constraints '
+            f'(2^{(max_x - 1) - combinations} times less)'
+        )
+        print('---' * 30)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,59 @@
+import numpy as np
+
+from discerning_sets.analyze.cooccurrence import occurrence_matrix
+
+"""
+This module sorts and deduplicates examples by packed keys instead of strings or tuples.
+A row of a 0/1 matrix (column x - 1 for element x) is packed with `np.packbits` into bytes,
+which are compared as one opaque key, so the order of keys is the lexicographic order of the rows,
+e.g. {1, 4, 5} -> 10011.
+
+Translation-invariant keys are keys of sets shifted so that they start at 1,
+two sets have the same key iff they have the same differences of consecutive elements.
+"""
+
+
+def packed_keys(matrix):
+    """
+    One key per row of a 0/1 matrix, keys compare as the rows lexicographically.
+    """
+    packed = np.ascontiguousarray(np.packbits(np.asarray(matrix, dtype=np.uint8), axis=1))
+
+    return packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+
+
+def order_rows(matrix):
+    """
+    Indices sorting the rows lexicographically (stable, so equal rows keep their order).
+    """
+    return np.argsort(packed_keys(matrix), kind='stable')
+
+
+def sort_rows(matrix):
+
+    matrix = np.asarray(matrix)
+
+    return matrix[order_rows(matrix)]
+
+
+def unique_rows(matrix):
+    """
+    Indices of the first occurrence of every distinct row, in the original order.
+    """
+    _, first = np.unique(packed_keys(matrix), return_index=True)
+
+    return np.sort(first)
+
+
+def difference_matrix(sets, n):
+    """
+    0/1 matrix of sets from 1..n shifted to start at 1.
+    """
+    return occurrence_matrix([[x - s[0] + 1 for x in s] for s in sets], n)
+
+
+def unique_translations(sets, n):
+    """
+    Indices of the first set of every class of sets equal up to translation, in the original order.
+    """
+    return unique_rows(difference_matrix(sets, n))
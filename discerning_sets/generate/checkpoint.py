@@ -0,0 +1,114 @@
+import os
+import pickle
+from pathlib import Path
+
+"""
+This module makes long-running generation crash-safe.
+Subset walks (see `search.py`) are periodically pickled, and a walk started with an existing checkpoint
+continues from the saved cursor with the saved `max_m`, hits (or the state of their sink) and `c`.
+Results of finished ns are stored one file per n, so saving a new n never rewrites the previous ones.
+
+A walk split into shards stores its layout (number `k` of items fixing the shard and the search method)
+in `manifest.pickle`. A resumed walk keeps the stored layout whatever its number of processes,
+so every shard finds its checkpoint, and checkpoints and sinks of other layouts are removed.
+
+All files are written to a temporary file first and then atomically renamed,
+so a crash during the save leaves the previous version intact.
+"""
+
+
+# number of Gray-code steps between two checkpoints
+EVERY = 1 << 22
+
+
+def save(obj, path):
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = path.with_name(path.name + '.tmp')
+    with tmp.open('wb') as f:
+        pickle.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp, path)
+
+
+def load(path):
+
+    with Path(path).open('rb') as f:
+        return pickle.load(f)
+
+
+def run_with_checkpoints(scan, path, every=EVERY):
+    """
+    Run the walk to the end, saving it to `path` after every `every` steps.
+    If `path` already contains a checkpoint of the same walk, we continue from it.
+    """
+    path = Path(path)
+
+    if path.exists():
+        saved = load(path)
+        if (saved.masks, saved.sizes, saved.base, saved.sink is None) != \
+                (scan.masks, scan.sizes, scan.base, scan.sink is None):
+            raise ValueError(f'Checkpoint {path} belongs to a different walk')
+        scan = saved
+
+    while not scan.done:
+        scan.run(every)
+        save(scan, path)
+
+    return scan.max_m, scan.hits, scan.c
+
+
+def layout(directories, k, method):
+    """
+    Shard layout of a walk checkpointed or streamed to `directories` (None entries are skipped).
+    The first run stores `k` and `method` to every directory, later runs reuse the stored `k`.
+    Returns `k` of the layout.
+    """
+    directories = list(dict.fromkeys(Path(directory) for directory in directories if directory is not None))
+
+    for directory in directories:
+        if (directory / 'manifest.pickle').exists():
+            manifest = load(directory / 'manifest.pickle')
+            if manifest['method'] != method:
+                raise ValueError(f'Walk in {directory} was run by `{manifest["method"]}`, not `{method}`')
+
+            k = manifest['k']
+            break
+
+    for directory in directories:
+        save({'k': k, 'method': method}, directory / 'manifest.pickle')
+
+        # files are named `shard_{k}_{prefix}.pickle` and `hits_{k}_{prefix}_{width}.bin`
+        for path in [*directory.glob('shard_*.pickle'), *directory.glob('hits_*.bin')]:
+            if int(path.stem.split('_')[1]) != k:
+                path.unlink()
+
+    return k
+
+
+def load_layout(directory):
+    """
+    `k` of the layout stored in `directory`, or None if there is no walk there.
+    """
+    path = Path(directory) / 'manifest.pickle'
+
+    return load(path)['k'] if path.exists() else None
+
+
+def save_result(directory, n, result):
+
+    save(result, Path(directory) / f'{n}.pickle')
+
+
+def load_results(directory):
+    """
+    Load all finished ns from `directory` in the format of the cumulative pickles: n -> (max_m, examples, c).
+    """
+    # other pickles (e.g. `index.pickle` of the store) are not results
+    paths = [path for path in Path(directory).glob('*.pickle') if path.stem.isdigit()]
+
+    return {int(path.stem): load(path) for path in sorted(paths, key=lambda path: int(path.stem))}
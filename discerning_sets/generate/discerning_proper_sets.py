@@ -1,89 +1,198 @@
-import pickle
-from itertools import chain, combinations
+import os
+import shutil
+from functools import reduce
 from pathlib import Path
 
+from discerning_sets.generate.checkpoint import load_results, save_result
+from discerning_sets.generate.residues import ResidueParity, residue_counts
+from discerning_sets.generate.search import merge_results, read_partial, run_scan
+from discerning_sets.store import ResultStore
+
 """
 This module generates proper sets for ns in the given interval.
 Maximum computed number was n=62 (runs over a day on my laptop).
 
 For this, it tests all subset of [n] with sum `s` constructed as 
 {1} + randomly generated first half from [2..(s-1)/2] + compliment second half making `n + 1` sum.
-
-It stores generated examples in `data/results_proper_{n}.pickle` for reproducibility. 
-Format of the pickle file is described in `discerning_sets.py`.
+First halves are walked in Gray-code order (see `search.py`), split into shards run on all cores,
+and found examples are sorted at the end.
+
+It stores generated examples for each n in `data/results_proper/{n}.pickle` for reproducibility
+(`checkpoint.load_results` collects them into the dictionary described in `discerning_sets.py`)
+and adds them to the store in the same directory (see `store.py`).
+The search for the current n is checkpointed in `data/results_proper/checkpoint_{n}`,
+so running `main` again resumes an interrupted sweep.
+Found examples are streamed to the same directory, `partial_result` reads them while the search is running.
+
+The search can be restricted by constraints derived from (un)similarities of elements in known examples
+(see `analyze/similarities_constraints.py`), then only sets consistent with them are tested.
+`verify_constraints` checks for small n that the constrained search finds all examples.
 """
 
 
-def subsets(s):
+def proper_set(sum_, half_set):
+
+    return (1, ) + half_set + tuple(sum_ - x for x in half_set)[::-1] + (sum_ - 1, )
+
+
+def candidates(sum_):
+
+    return list(range(2, (sum_ - 1) // 2 + 1))
 
-    max_half = (s - 1) // 2
 
-    for half_set in _subsets(max_half):
-        yield (1, ) + half_set + tuple(s - x for x in half_set)[::-1] + (s - 1, )
+def constrained_variables(sum_, constraints):
+    """
+    Translate constraints (in the format of `similarities_constraints.get_constraints`) to variables of the walk.
+    Elements of a group are chosen together and a group with a counterpart is chosen iff the counterpart is not,
+    so each group (or pair of opposite groups) is one variable.
+    Every variable is a pair (ones, zeros) of elements chosen if the variable is 1 and if it is 0 respectively.
+    Groups containing 1 (which is in every set) are forced, elements not mentioned in constraints stay free.
+    Returns variables and a tuple of elements forced into the first half.
+    """
+    items = set(candidates(sum_))
 
+    variables = []
+    forced = set()
 
-def _subsets(n):
+    # elements are removed from `items` once used, so the reversed constraint of a pair is skipped
+    for group, opposite in constraints.items():
+        group = tuple(x for x in group if x in items or x == 1)
+        opposite = tuple(x for x in opposite if x in items or x == 1)
 
-    s = list(range(2, n + 1))
+        if 1 in opposite:
+            group, opposite = opposite, group
 
-    return chain.from_iterable(combinations(s, r) for r in range(1, n))
+        if 1 in group:
+            forced.update(x for x in group if x != 1)
+        elif group:
+            variables.append((group, opposite))
+        else:
+            continue
 
+        items -= set(group) | set(opposite)
 
-def residue_counts(s, m):
+    variables.extend(((x, ), ()) for x in items)
 
-    counts = [0 for _ in range(m)]
-    for el in s:
-        counts[el % m] += 1
+    return sorted(variables), tuple(sorted(forced))
 
-    return counts
 
+def to_candidate_bits(variables, forced, variable_bits):
+    """
+    Translate chosen variables (see `constrained_variables`) to chosen candidates (element x is the bit x - 2).
+    """
+    elements = list(forced)
+    for j, (ones, zeros) in enumerate(variables):
+        elements.extend(ones if variable_bits >> j & 1 else zeros)
 
-def test_residues(counts):
+    return sum(1 << (x - 2) for x in elements)
 
-    for i, c in enumerate(counts):
-        if c % 2 == 1:
-            return i
 
+def scan_halves(parity, sum_, processes=None, checkpoint=None, method='walk', constraints=None, sink=None):
+    """
+    Walk over all non-empty first halves from [2..(sum_ - 1) / 2],
+    where choosing x adds both x and sum_ - x to the set and 1, sum_ - 1 are always present.
+    If `constraints` are given, only first halves consistent with them are walked.
+    Returns (max_m, hits, c) with hits over candidates (see `candidates`).
+    """
+    def mask(elements):
+        return reduce(lambda state, x: state ^ parity.mask(x) ^ parity.mask(sum_ - x), elements, 0)
 
-def analyze_n(n):
+    variables, forced = constrained_variables(sum_, constraints or {})
+    masks = [mask(ones) ^ mask(zeros) for ones, zeros in variables]
+    base = parity.mask(1) ^ parity.mask(sum_ - 1) ^ mask(forced) ^ mask(x for _, zeros in variables for x in zeros)
 
-    max_m = 0
-    c = 0
+    # first half can be empty only if all variables are single elements and nothing is forced
+    empty = not forced and not any(zeros for _, zeros in variables)
+    sizes = range(1, len(variables) + 1) if empty else None
+
+    max_m, hits, c = run_scan(
+        parity, masks, sizes=sizes, base=base,
+        processes=processes, checkpoint=checkpoint, method=method, sink=sink
+    )
+
+    return max_m, [(to_candidate_bits(variables, forced, bits), m, i) for bits, m, i in hits], c
+
+
+def to_examples(hits):
+    """
+    Translate hits (sum_, bits, m, i) to examples, ordered by sum first
+    and then by first halves as they come from `itertools.combinations` (by size and lexicographically).
+    """
     examples = []
+    for sum_, bits, m, i in hits:
+        half_set = tuple(x for j, x in enumerate(candidates(sum_)) if bits >> j & 1)
+        s = proper_set(sum_, half_set)
+        example = (s, None, None, None) if i is None else (s, m, i, residue_counts(s, m))
+        examples.append(((sum_, len(half_set), half_set), example))
+
+    return [example for _, example in sorted(examples, key=lambda item: item[0])]
 
+
+def analyze_n(n, processes=None, checkpoint=None, method='walk', constraints=None, sink=None):
+    """
+    :param constraints: optional dictionary sum -> constraints (for sums n and n + 1) restricting the search
+    :param sink: optional directory hits are streamed to during the search (see `partial_result`)
+    """
+    parity = ResidueParity(n)
+    constraints = constraints or {}
+
+    results = []
     for sum_ in [n, n + 1]:
-        for s in subsets(sum_):
+        sum_checkpoint = None if checkpoint is None else Path(checkpoint) / str(sum_)
+        sum_sink = None if sink is None else Path(sink) / str(sum_)
+        max_m, hits, c = scan_halves(
+            parity, sum_, processes, sum_checkpoint, method, constraints.get(sum_), sum_sink
+        )
+        results.append((max_m, [(sum_, ) + hit for hit in hits], c))
+
+    max_m, hits, c = merge_results(results)
 
-            c += 1
-            for m in range(2, n):
-                counts = residue_counts(s, m)
-                i = test_residues(counts)
+    return max_m, to_examples(hits), c
 
-                if i is not None:
-                    # print(f'{s=}: {m=}, {i=}, {counts=}')
-                    if m == max_m:
-                        examples.append((s, m, i, counts))
-                    elif m > max_m:
-                        max_m = m
-                        examples = [(s, m, i, counts)]
-                    break
 
-            else:
-                if max_m == n:
-                    examples.append((s, None, None, None))
-                elif n > max_m:
-                    max_m = n
-                    examples = [(s, None, None, None)]
+def partial_result(n, sink, constraints=None):
+    """
+    Examples found so far by a (possibly running) `analyze_n` streaming to `sink`, returns (max_m, examples).
+    `constraints` have to be the same as for the search.
+    """
+    constraints = constraints or {}
+
+    results = []
+    for sum_ in [n, n + 1]:
+        variables, forced = constrained_variables(sum_, constraints.get(sum_) or {})
+        max_m, hits = read_partial(Path(sink) / str(sum_))
+        results.append((max_m, [(sum_, to_candidate_bits(variables, forced, bits), m, i) for bits, m, i in hits], 0))
+
+    max_m, hits, _ = merge_results(results)
 
-    return max_m, examples, c
+    return max_m, to_examples(hits)
+
+
+def verify_constraints(n, constraints, processes=None):
+    """
+    Compare constrained search with the unconstrained one (feasible for small n).
+    Returns examples of the unconstrained search which constrained search missed - empty list if constraints hold.
+    """
+    _, examples, _ = analyze_n(n, processes)
+    _, constrained, _ = analyze_n(n, processes, constraints=constraints)
+
+    return [example for example in examples if example not in constrained]
 
 
 def main():
 
-    result = {}
+    directory = Path('../data/results_proper')
+    processes = os.cpu_count()
+
+    # finished ns are loaded, the interrupted one continues from its checkpoint
+    result = load_results(directory)
 
     for n in range(6, 63):
-        max_m, examples, c = analyze_n(n)
+        if n in result:
+            continue
+
+        checkpoint = directory / f'checkpoint_{n}'
+        max_m, examples, c = analyze_n(n, processes, checkpoint, sink=checkpoint)
         result[n] = max_m, examples, c
 
         print('---' * 3)
@@ -92,9 +201,9 @@ def main():
             print(f's = {[x for x in s[:len(s) // 2]]} | {[x for x in s[len(s) // 2:]]}')
         print()
 
-        if n > 40:
-            with Path(f'../data/results_proper_{n}.pickle').open('wb') as f:
-                pickle.dump(result, f)
+        save_result(directory, n, result[n])
+        ResultStore(directory).write({n: result[n]})
+        shutil.rmtree(checkpoint)
 
 
 if __name__ == '__main__':
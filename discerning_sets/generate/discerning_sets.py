@@ -1,14 +1,25 @@
-import pickle
-from itertools import chain, combinations
+import os
+import shutil
 from pathlib import Path
 
+from discerning_sets.generate.checkpoint import load_results, save_result
+from discerning_sets.generate.residues import ResidueParity, residue_counts
+from discerning_sets.generate.search import read_partial, run_scan
+from discerning_sets.store import ResultStore
+
 """
 This module generates critical sets for ns in the given interval. 
 For this, it tests all subset of [n] with even number of elements and founds ones with maximum `m`.
+Subsets are walked in Gray-code order (see `search.py`), split into shards run on all cores,
+and found sets are sorted at the end.
 Maximum computed number was n=34 (runs over a day on my laptop).
 
-For each n, it stores generated sets in `data/results_{n}.pickle` for reproducibility.
-In pickle file, there is a dictionary, where for each n list of critical sets in the following format is stored:
+For each n, it stores generated sets in `data/results/{n}.pickle` for reproducibility
+and adds them to the store in the same directory (see `store.py`), which plots read,
+the search for the current n is checkpointed in `data/results/checkpoint_{n}` and resumed by running `main` again.
+Found sets are streamed to the same directory, `partial_result` reads them while the search is running.
+`checkpoint.load_results` collects stored ns into a dictionary (the same as in older `data/results_{n}.pickle`),
+where for each n list of critical sets in the following format is stored:
 n -> (max_m, examples, c), 
 where `examples` is the list of examples and `c` is a number of processed subsets. 
 Critical sets are stored in the following format:
@@ -18,67 +29,55 @@ where `s` is a set, `m` is m for this set, `i` is the residue where violation fo
 """
 
 
-def even_subsets(n):
-
-    s = list(range(1, n + 1))
-
-    return chain.from_iterable(combinations(s, r) for r in range(4, n, 2))
-
-
-def residue_counts(s, m):
-
-    counts = [0 for _ in range(m)]
-    for el in s:
-        counts[el % m] += 1
-
-    return counts
-
-
-def test_residues(counts):
+def to_sets(n, hits):
+    """
+    Translate hits of the subset walk (bitmask over elements 1..n) to critical sets
+    sorted by size and lexicographically, i.e. in the order of `itertools.combinations`.
+    """
+    sets = []
+    for bits, m, i in hits:
+        s = tuple(x for x in range(1, n + 1) if bits >> (x - 1) & 1)
+        sets.append((s, None, None, None) if i is None else (s, m, i, residue_counts(s, m)))
 
-    for i, c in enumerate(counts):
-        if c % 2 == 1:
-            return i
+    return sorted(sets, key=lambda example: (len(example[0]), example[0]))
 
 
-def analyze_n(n):
+def analyze_n(n, processes=None, checkpoint=None, method='walk', sink=None):
 
-    max_m = 0
-    c = 0
-    sets = []
+    # all subsets of [n] with even number of elements from 4 to n - 1
+    parity = ResidueParity(n)
+    masks = [parity.mask(x) for x in range(1, n + 1)]
 
-    for s in even_subsets(n):
+    max_m, hits, c = run_scan(
+        parity, masks, sizes=range(4, n, 2), processes=processes, checkpoint=checkpoint, method=method, sink=sink
+    )
 
-        c += 1
-        for m in range(2, n):
-            counts = residue_counts(s, m)
-            i = test_residues(counts)
+    return max_m, to_sets(n, hits), c
 
-            if i is not None:
-                # print(f'{s=}: {m=}, {i=}, {counts=}')
-                if m == max_m:
-                    sets.append((s, m, i, counts))
-                elif m > max_m:
-                    max_m = m
-                    sets = [(s, m, i, counts)]
-                break
 
-        else:
-            if max_m == n:
-                sets.append((s, None, None, None))
-            elif n > max_m:
-                max_m = n
-                sets = [(s, None, None, None)]
+def partial_result(n, sink):
+    """
+    Critical sets found so far by a (possibly running) `analyze_n` streaming to `sink`, returns (max_m, sets).
+    """
+    max_m, hits = read_partial(sink)
 
-    return max_m, sets, c
+    return max_m, to_sets(n, hits)
 
 
 def main():
 
-    result = {}
+    directory = Path('../data/results')
+    processes = os.cpu_count()
+
+    # finished ns are loaded, the interrupted one continues from its checkpoint
+    result = load_results(directory)
 
     for n in range(6, 40):
-        max_m, sets, c = analyze_n(n)
+        if n in result:
+            continue
+
+        checkpoint = directory / f'checkpoint_{n}'
+        max_m, sets, c = analyze_n(n, processes, checkpoint, sink=checkpoint)
         result[n] = max_m, sets, c
 
         print('---' * 3)
@@ -88,8 +87,9 @@ def main():
             print(f'{s = }, {m = }, {i = }, {counts = }')
         print()
 
-        with Path(f'../data/results_{n}.pickle').open('wb') as f:
-            pickle.dump(result, f)
+        save_result(directory, n, result[n])
+        ResultStore(directory).write({n: result[n]})
+        shutil.rmtree(checkpoint)
 
 
 if __name__ == '__main__':
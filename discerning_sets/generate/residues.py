@@ -0,0 +1,43 @@
+"""
+This module keeps parities of residue classes of a subset for all moduli at once.
+For given n we consider every m in [2, n) and every residue class i modulo m.
+Parity of all those classes is packed into one integer: class i modulo m is the bit `offsets[m] + i`,
+moduli are ordered increasingly, so the lowest set bit is the first odd residue class for the smallest m
+(`classes[(state & -state).bit_length() - 1]`, the walks in `search.py` look it up inline).
+
+Each element x has a mask with one bit per modulus (the bit of its class x % m),
+thus an element entering or leaving the subset updates parities for all m by a single XOR.
+"""
+
+
+class ResidueParity:
+
+    def __init__(self, n):
+        """
+        :param n: we track residue classes modulo m for m in [2, n)
+        """
+        self.n = n
+
+        self.offsets = {}
+        self.classes = []  # bit -> (m, i)
+        for m in range(2, n):
+            self.offsets[m] = len(self.classes)
+            self.classes.extend((m, i) for i in range(m))
+
+        self._masks = {}
+
+    def mask(self, x):
+
+        if x not in self._masks:
+            self._masks[x] = sum(1 << (offset + x % m) for m, offset in self.offsets.items())
+
+        return self._masks[x]
+
+
+def residue_counts(s, m):
+
+    counts = [0 for _ in range(m)]
+    for el in s:
+        counts[el % m] += 1
+
+    return counts
@@ -0,0 +1,431 @@
+import math
+from functools import partial, reduce
+from multiprocessing import Pool
+from pathlib import Path
+
+from discerning_sets.generate.checkpoint import layout, load_layout, run_with_checkpoints
+from discerning_sets.generate.sink import HitSink, read_hits
+
+"""
+This module walks over subsets of candidate items and looks for those with maximum `m`
+(the smallest modulus with an odd residue class, see `residues.py`).
+
+Every candidate item has its parity mask - XOR of masks of elements it adds to the set.
+Subsets are enumerated in Gray-code order, so two consecutive subsets differ in exactly one item,
+and the parity of residue classes (as well as the size) is updated in constant time per step.
+The subset at Gray-code step `t` is given by bitmask t ^ (t >> 1) over items.
+
+Result of the walk is a triple (max_m, hits, c), where `hits` are (bits, m, i) for all subsets reaching max_m,
+`bits` is the bitmask of chosen items and `c` is the number of processed subsets.
+If a subset has no odd residue class, its hit is (bits, n, None).
+Generators translate hits to examples and sort them in their canonical order.
+
+The walk can be sharded by the assignment of the first `k` items: each of 2^k shards walks over the remaining items
+with the chosen prefix items added to the base parity. Shards are run in a process pool and merged in the order of
+prefixes, and since generators sort hits at the end, the result is identical to the serial walk.
+
+A walk is resumable: its cursor is the next Gray-code step, from which the parity state is restored,
+so it can be checkpointed together with found hits (see `checkpoint.py`).
+Hits of the walk can be streamed to a file per shard (see `sink.py`) instead of being kept in memory,
+`read_partial` collects them while the search is still running.
+"""
+
+
+def gray_code(step):
+
+    return step ^ (step >> 1)
+
+
+class Scan:
+    """
+    Common part of the search methods: the searched subsets and the result found so far.
+    """
+
+    def __init__(self, parity, masks, sizes=None, base=0):
+        """
+        :param parity: `ResidueParity` describing the moduli
+        :param masks: parity mask for every candidate item
+        :param sizes: allowed numbers of chosen items (all if None), other subsets are skipped and not counted
+        :param base: parity of elements which are always present
+        """
+        self.parity = parity
+        self.masks = list(masks)
+        self.sizes = None if sizes is None else frozenset(sizes)
+        self.base = base
+
+        self.max_m = 0
+        self.hits = []
+        self.c = 0
+
+    def allowed(self):
+        """
+        allowed[size] tells whether subsets with `size` chosen items are searched.
+        """
+        return [self.sizes is None or size in self.sizes for size in range(len(self.masks) + 1)]
+
+
+class SubsetScan(Scan):
+
+    def __init__(self, parity, masks, sizes=None, base=0):
+
+        super().__init__(parity, masks, sizes, base)
+
+        # cursor - the next Gray-code step to process
+        self.step = 0
+
+        # optional `HitSink` - hits are streamed to it instead of `hits`
+        self.sink = None
+
+    @property
+    def done(self):
+
+        return self.step >= 1 << len(self.masks)
+
+    def restore(self):
+        """
+        Restore the walk state (parity, chosen items and their number) after the last processed step.
+        """
+        if not self.step:
+            return self.base, 0, 0
+
+        bits = gray_code(self.step - 1)
+
+        state = self.base
+        for j, mask in enumerate(self.masks):
+            if bits >> j & 1:
+                state ^= mask
+
+        return state, bits, bin(bits).count('1')
+
+    def run(self, steps=None):
+        """
+        Process next `steps` Gray-code steps (all remaining ones by default).
+        Returns (max_m, hits, c) found so far, hits are empty if they go to the sink.
+        """
+        sink = self.sink
+        classes = self.parity.classes
+        n = self.parity.n
+        masks = self.masks
+        k = len(masks)
+        allowed = self.allowed()
+
+        end = 1 << k if steps is None else min(1 << k, self.step + steps)
+
+        max_m, hits, c = self.max_m, self.hits, self.c
+        state, bits, size = self.restore()
+
+        if sink is not None:
+            sink.open()
+
+        for step in range(self.step, end):
+
+            if step:
+                j = (step & -step).bit_length() - 1
+                bits ^= 1 << j
+                state ^= masks[j]
+                size += 1 if bits >> j & 1 else -1
+
+            if not allowed[size]:
+                continue
+
+            c += 1
+            if state:
+                m, i = classes[(state & -state).bit_length() - 1]
+            else:
+                m, i = n, None
+
+            if m < max_m:
+                continue
+            if m > max_m:
+                max_m = m
+                hits = []
+                if sink is not None:
+                    sink.reset()
+
+            if sink is None:
+                hits.append((bits, m, i))
+            else:
+                sink.append(bits, m, i)
+
+        if sink is not None:
+            sink.close()
+
+        self.step = end
+        self.max_m, self.hits, self.c = max_m, hits, c
+
+        return max_m, hits, c
+
+
+class PrunedScan(Scan):
+    """
+    Branch-and-bound alternative to `SubsetScan` with the same interface (but without a resumable cursor).
+    Items are decided one by one (in decreasing order of index) in a depth-first search.
+    For a partial assignment, residue classes which are odd and not touched by any undecided item
+    stay odd in every completion, so the first of them bounds the reachable m from above.
+    Subtrees which cannot tie or beat current `max_m` are cut, and so are subtrees without allowed sizes.
+    Subsets of cut subtrees are still counted in `c` (by binomial coefficients),
+    so the result is the same as for the full walk.
+    """
+
+    def run(self):
+
+        classes = self.parity.classes
+        n = self.parity.n
+        masks = self.masks
+        k = len(masks)
+        allowed = self.allowed()
+
+        order = list(range(k))[::-1]
+
+        # cover[d] - classes touched by items undecided at depth d
+        cover = [0] * (k + 1)
+        for d in range(k - 1, -1, -1):
+            cover[d] = cover[d + 1] | masks[order[d]]
+
+        # completions[free][size] - number of allowed subsets with `size` chosen and `free` undecided items
+        completions = [
+            [sum(math.comb(free, j) for j in range(free + 1) if allowed[size + j]) for size in range(k - free + 1)]
+            for free in range(k + 1)
+        ]
+
+        def visit(d, state, bits, size):
+
+            total = completions[k - d][size]
+            if not total:
+                return
+
+            forced = state & ~cover[d]
+            if forced and classes[(forced & -forced).bit_length() - 1][0] < self.max_m:
+                self.c += total
+                return
+
+            if d == k:
+                self.c += 1
+                m, i = classes[(state & -state).bit_length() - 1] if state else (n, None)
+
+                if m > self.max_m:
+                    self.max_m = m
+                    self.hits = []
+                self.hits.append((bits, m, i))
+                return
+
+            j = order[d]
+            visit(d + 1, state, bits, size)
+            visit(d + 1, state ^ masks[j], bits | 1 << j, size + 1)
+
+        visit(0, self.base, 0, 0)
+
+        return self.max_m, self.hits, self.c
+
+
+class MiddleScan(Scan):
+    """
+    Meet-in-the-middle alternative to `SubsetScan` with the same interface (but without a resumable cursor).
+    Items are split into two halves and parities of all subsets of each half are enumerated (2^(k/2) each).
+    A subset reaches at least `t` iff its parity has no odd class modulo m < t, i.e. the parities of its halves
+    agree on the classes modulo m < t. We index the left half by those classes and look up the right halves,
+    which decides whether `t` is reachable. The maximum is found by binary search over `t`
+    and then all subsets reaching it are collected from the index.
+    """
+
+    @staticmethod
+    def subsets(masks, shift=0, base=0):
+        """
+        Parities, bitmasks (shifted by `shift`) and sizes of all subsets of items with given masks.
+        """
+        states, bits, sizes = [base], [0], [0]
+        for j, mask in enumerate(masks):
+            states += [state ^ mask for state in states]
+            bits += [b | 1 << (j + shift) for b in bits]
+            sizes += [size + 1 for size in sizes]
+
+        return list(zip(states, bits, sizes))
+
+    def low(self, t):
+        """
+        Bitmask of residue classes modulo m < t.
+        """
+        offsets = self.parity.offsets
+        return (1 << offsets[t]) - 1 if t in offsets else (1 << len(self.parity.classes)) - 1
+
+    def index(self, left, t):
+
+        low = self.low(t)
+        index = {}
+        for state, bits, size in left:
+            index.setdefault(state & low, []).append((bits, size))
+
+        return low, index
+
+    def reachable(self, left, right, allowed, t):
+
+        low, index = self.index(left, t)
+
+        for state, _, size in right:
+            if any(allowed[size + left_size] for _, left_size in index.get(state & low, ())):
+                return True
+
+        return False
+
+    def run(self):
+
+        classes = self.parity.classes
+        n = self.parity.n
+        k = len(self.masks)
+        allowed = self.allowed()
+
+        h = k // 2
+        left = self.subsets(self.masks[:h])
+        right = self.subsets(self.masks[h:], shift=h, base=self.base)
+
+        self.c = sum(math.comb(k, size) for size in range(k + 1) if allowed[size])
+        if not self.c:
+            return self.max_m, self.hits, self.c
+
+        # every allowed subset reaches t = 2, find the largest reachable t
+        lo, hi = 2, n
+        while lo < hi:
+            t = (lo + hi + 1) // 2
+            if self.reachable(left, right, allowed, t):
+                lo = t
+            else:
+                hi = t - 1
+
+        low, index = self.index(left, lo)
+
+        self.max_m = lo
+        self.hits = []
+        for right_state, right_bits, right_size in right:
+            for left_bits, left_size in index.get(right_state & low, ()):
+                if not allowed[left_size + right_size]:
+                    continue
+
+                bits = left_bits | right_bits
+                state = right_state
+                for j in range(h):
+                    if left_bits >> j & 1:
+                        state ^= self.masks[j]
+
+                m, i = classes[(state & -state).bit_length() - 1] if state else (n, None)
+                self.hits.append((bits, m, i))
+
+        return self.max_m, self.hits, self.c
+
+
+METHODS = {
+    'walk': SubsetScan,
+    'prune': PrunedScan,
+    'middle': MiddleScan,
+}
+
+
+def merge_results(results):
+    """
+    Merge results of walks over disjoint parts of the subset space.
+    Hits of the parts reaching overall maximum are concatenated in the order of parts, counts are summed.
+    """
+    results = list(results)
+
+    max_m = max((max_m for max_m, _, _ in results), default=0)
+    hits = [hit for part_m, part_hits, _ in results if part_m == max_m for hit in part_hits]
+    c = sum(c for _, _, c in results)
+
+    return max_m, hits, c
+
+
+def shards(parity, masks, sizes=None, base=0, k=0, scan=SubsetScan):
+    """
+    Split the walk by the assignment of the first `k` items.
+    Yields (prefix, k, scan), where `prefix` is the bitmask of chosen items among the first `k`
+    and `scan` walks over the remaining items.
+    """
+    masks = list(masks)
+
+    for prefix in range(1 << k):
+        chosen = [masks[j] for j in range(k) if prefix >> j & 1]
+
+        shard_base = reduce(lambda x, y: x ^ y, chosen, base)
+        shard_sizes = None if sizes is None else [size - len(chosen) for size in sizes if size >= len(chosen)]
+
+        yield prefix, k, scan(parity, masks[k:], shard_sizes, shard_base)
+
+
+def run_shard(shard, checkpoint=None, sink=None):
+    """
+    Run the walk of one shard. If `checkpoint` directory is given, the walk is periodically saved there
+    and resumed from the saved state if there is one.
+    If `sink` directory is given, hits are streamed to a file there and read back when the walk is finished.
+    """
+    prefix, k, scan = shard
+
+    if sink is not None:
+        width = (len(scan.masks) + 7) // 8
+        scan.sink = HitSink(Path(sink) / f'hits_{k}_{prefix}_{width}.bin', width)
+
+    if checkpoint is None:
+        max_m, hits, c = scan.run()
+    else:
+        max_m, hits, c = run_with_checkpoints(scan, Path(checkpoint) / f'shard_{k}_{prefix}.pickle')
+
+    if sink is not None:
+        hits = scan.sink.read()
+
+    return max_m, [((bits << k) | prefix, m, i) for bits, m, i in hits], c
+
+
+def read_partial(sink):
+    """
+    Collect hits streamed to `sink` directory by shards of a (possibly running) walk.
+    Returns (max_m, hits) found so far, hits are in the same format as the result of `run_scan`.
+    """
+    k = load_layout(sink)
+    if k is None:
+        return 0, []
+
+    # only files of the current layout, a restarted walk may not have removed the old ones yet
+    results = []
+    for path in sorted(Path(sink).glob(f'hits_{k}_*.bin')):
+        _, prefix, width = map(int, path.stem.split('_')[1:])
+        hits = read_hits(path, width)
+
+        # a shard may be truncating its file right now, keep hits of its current maximum only
+        max_m = max((m for _, m, _ in hits), default=0)
+        results.append((max_m, [((bits << k) | prefix, m, i) for bits, m, i in hits if m == max_m], 0))
+
+    max_m, hits, _ = merge_results(results)
+
+    return max_m, hits
+
+
+def run_scan(parity, masks, sizes=None, base=0, processes=None, k=None, checkpoint=None, method='walk', sink=None):
+    """
+    Walk over subsets serially (if `processes` is None) or in a pool of `processes` processes.
+    By default, the space is split into about 4 shards per process.
+    With `checkpoint` directory, every shard is checkpointed and an interrupted walk continues where it stopped,
+    in the layout of shards of its first run (see `checkpoint.layout`).
+    With `sink` directory, hits are streamed to disk during the walk (see `sink.py`).
+    Shards are searched by the Gray-code walk (`walk`), branch-and-bound (`prune`) or meet-in-the-middle (`middle`),
+    only the walk can be checkpointed and streamed.
+    """
+    masks = list(masks)
+
+    if method != 'walk' and (checkpoint is not None or sink is not None):
+        raise ValueError(f'Search method `{method}` can not be checkpointed or streamed')
+
+    scan = METHODS[method]
+    run = partial(run_shard, checkpoint=checkpoint, sink=sink)
+
+    if k is None:
+        k = 0 if processes is None else math.ceil(math.log2(4 * processes))
+    k = min(k, len(masks))
+
+    if checkpoint is not None or sink is not None:
+        k = layout([checkpoint, sink], k, method)
+
+    if processes is None:
+        return merge_results(map(run, shards(parity, masks, sizes, base, k, scan)))
+
+    with Pool(processes) as pool:
+        results = pool.map(run, shards(parity, masks, sizes, base, k, scan))
+
+    return merge_results(results)
@@ -0,0 +1,81 @@
+import struct
+from pathlib import Path
+
+"""
+This module streams hits of a subset walk (see `search.py`) to disk instead of keeping them in memory.
+A sink is an append-only file of fixed-size records: `m` and `i` as int16 (i = -1 stands for None)
+followed by the bitmask of chosen items in `width` little-endian bytes.
+When the walk finds a new `max_m`, the file is truncated, so it always holds hits of the current maximum only.
+
+The file is written through a buffer and flushed when the walk returns,
+so a reader (see `search.read_partial`) sees complete records found so far while the search is still running.
+The sink remembers how many records were flushed and is pickled with the walk,
+so a walk resumed from a checkpoint drops records written after the checkpoint.
+"""
+
+
+RECORD = struct.Struct('<hh')
+
+
+class HitSink:
+
+    def __init__(self, path, width):
+        """
+        :param path: file with records
+        :param width: number of bytes of the bitmask
+        """
+        self.path = Path(path)
+        self.width = width
+        self.size = RECORD.size + width
+
+        # number of records flushed by the last `close`
+        self.count = 0
+        self.file = None
+
+    def __getstate__(self):
+
+        return {**self.__dict__, 'file': None}
+
+    def open(self):
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.file = self.path.open('r+b' if self.path.exists() else 'w+b')
+        self.file.truncate(self.count * self.size)
+        self.file.seek(0, 2)
+
+    def reset(self):
+
+        self.file.seek(0)
+        self.file.truncate()
+
+    def append(self, bits, m, i):
+
+        self.file.write(RECORD.pack(m, -1 if i is None else i) + bits.to_bytes(self.width, 'little'))
+
+    def close(self):
+
+        self.file.flush()
+        self.count = self.file.tell() // self.size
+        self.file.close()
+        self.file = None
+
+    def read(self):
+
+        return read_hits(self.path, self.width)
+
+
+def read_hits(path, width):
+    """
+    Read complete records of the sink as hits (bits, m, i).
+    """
+    size = RECORD.size + width
+    data = Path(path).read_bytes()
+
+    hits = []
+    for start in range(0, len(data) - size + 1, size):
+        m, i = RECORD.unpack_from(data, start)
+        bits = int.from_bytes(data[start + RECORD.size:start + size], 'little')
+        hits.append((bits, m, None if i < 0 else i))
+
+    return hits
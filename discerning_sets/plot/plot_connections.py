@@ -1,57 +1,36 @@
 import pickle
-from collections import defaultdict
 from pathlib import Path
 
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
 
-from plot_occurrences import count_occurrences
+from discerning_sets.analyze.cooccurrence import cooccurrence, first_halves, jaccard, occurrence_matrix
 
 """
 This module plots a connection graph for pairs of elements for one or multiple given ns.
 We count critical sets where X and Y occurs simultaneously and 
-divide it by number of sets where at least one of them occurs.
+divide it by number of sets where at least one of them occurs (see `analyze/cooccurrence.py`).
 
 We plot all numbers except for 1 (it occurs everywhere). 
 We can also introduce a threshold to plot only extreme cases as otherwise graph tends to be cluttered.
 """
 
 
-def main():
-
-    with Path(f'../data/results_unique_62.pickle').open('rb') as f:
-        result = pickle.load(f)
-
-    n = 52
-
-    result = {n: result[n]}
-
-    pair_occurrences = defaultdict(int)
-    elements = set()
-
-    for n, (_, examples, _) in result.items():
+def connection_weights(result):
+    """
+    Weights of pairs of elements which occur together in first halves of examples at least once.
+    """
+    halves = [half for n, (_, examples, _) in result.items() for half in first_halves(examples)]
+    matrix = occurrence_matrix(halves, max(result))
 
-        for example, *_ in examples:
-            example = example[:(len(example) // 2)]
-            elements.update(example)
+    weights = jaccard(matrix)
+    xs, ys = np.nonzero(np.triu(cooccurrence(matrix), 1))
 
-            for i, x in enumerate(example):
-                for y in example[i + 1:]:
-                    pair_occurrences[x, y] += 1
+    return {(x + 1, y + 1): float(weights[x, y]) for x, y in zip(xs.tolist(), ys.tolist())}
 
-    single_occurrences = count_occurrences(result)
 
-    for x, y in pair_occurrences:
-        pair_occurrences[x, y] /= (single_occurrences[x] + single_occurrences[y] - pair_occurrences[x, y])
-
-    print(pair_occurrences)
-
-    # apply threshold?
-    values = np.array(list(pair_occurrences.values()))
-    quantile = 18
-    bound = np.quantile(values, quantile / 100)
-    print(bound, max(values))
+def plot_connections(pair_occurrences):
 
     # create graph
     edges_list = []
@@ -60,23 +39,49 @@ def main():
             continue
         edges_list.append((x, y, val))
 
-    weights = list(zip(*edges_list))[2]
-    print(max(weights))
+    weights = [val for _, _, val in edges_list]
 
     G = nx.Graph()
     G.add_weighted_edges_from(edges_list)
 
     # plot
+    fig = plt.figure()
     pos = nx.circular_layout(sorted(G.nodes()))
 
     nx.draw_networkx_nodes(G, pos, node_size=200)
     nx.draw_networkx_labels(G, pos, font_size=10)
 
-    edges = nx.draw_networkx_edges(G, pos, edge_color=weights)
-    plt.colorbar(edges)
+    # small ns have no pairs without 1
+    if edges_list:
+        edges = nx.draw_networkx_edges(G, pos, edge_color=weights)
+        plt.colorbar(edges)
 
     plt.axis('off')
 
+    return fig
+
+
+def main():
+
+    with Path(f'../data/results_unique_62.pickle').open('rb') as f:
+        result = pickle.load(f)
+
+    n = 52
+
+    result = {n: result[n]}
+
+    pair_occurrences = connection_weights(result)
+
+    print(pair_occurrences)
+
+    # apply threshold?
+    values = np.array(list(pair_occurrences.values()))
+    quantile = 18
+    bound = np.quantile(values, quantile / 100)
+    print(bound, max(values))
+
+    plot_connections(pair_occurrences)
+
     # plt.title(f'Threshold {bound:.2f}')
     # plt.savefig(f'images/connections_n_{n}.pdf')
     plt.show()
@@ -14,6 +14,27 @@ We can see that both borders grow, but at the first sight they look pretty rando
 """
 
 
+def count_intervals(matrix):
+    """
+    Number of intervals of consecutive 1s and 0s in every row of the examples matrix.
+    """
+    return np.diff(matrix, axis=0).astype(bool).sum(axis=0) + 1
+
+
+def plot_intervals(ns, mins, maxs):
+
+    fig = plt.figure()
+    plt.plot(ns, mins, '.-', label='min number of intervals')
+    plt.plot(ns, maxs, '.-', label='max number of intervals')
+
+    plt.xlabel('n')
+
+    plt.legend()
+    plt.grid()
+
+    return fig
+
+
 def main():
 
     with Path(f'../data/results_proper_62.pickle').open('rb') as f:
@@ -25,23 +46,14 @@ def main():
 
         print(n, m)
 
-        matrix = create_matrix(n, examples)
-
-        n_intervals = np.diff(matrix, axis=0).astype(bool).sum(axis=0) + 1  # number of intervals
+        n_intervals = count_intervals(create_matrix(n, examples))
         print(f'{n}: {min(n_intervals)}-{max(n_intervals)}, {n_intervals}')
 
         ns.append(n)
         mins.append(min(n_intervals))
         maxs.append(max(n_intervals))
 
-    plt.figure()
-    plt.plot(ns, mins, '.-', label='min number of intervals')
-    plt.plot(ns, maxs, '.-', label='max number of intervals')
-
-    plt.xlabel('n')
-
-    plt.legend()
-    plt.grid()
+    plot_intervals(ns, mins, maxs)
 
     # plt.savefig('images/number_unique.pdf')
     plt.show()
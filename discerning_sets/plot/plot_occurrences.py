@@ -48,10 +48,7 @@ def count_occurrences(result):
     return occurrences
 
 
-def main():
-
-    with Path(f'../data/results_proper_62.pickle').open('rb') as f:
-        result = pickle.load(f)
+def plot_occurrences(result):
 
     occurrences = count_occurrences(result)
     possible_appearance = possible_appearances(result, list(occurrences))
@@ -64,9 +61,19 @@ def main():
     x, y = zip(*occurrences)
     y = np.array(y) - 0.5
 
-    plt.figure()
+    fig = plt.figure()
     plt.bar(x[1:], y[1:])
 
+    return fig
+
+
+def main():
+
+    with Path(f'../data/results_proper_62.pickle').open('rb') as f:
+        result = pickle.load(f)
+
+    plot_occurrences(result)
+
     # plt.savefig('images/occurrences.pdf')
     plt.show()
 
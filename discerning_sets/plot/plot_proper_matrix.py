@@ -1,10 +1,9 @@
-import pickle
-from pathlib import Path
-
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from discerning_sets.analyze.cooccurrence import first_halves, occurrence_matrix
+from discerning_sets.canonical import sort_rows
+from discerning_sets.store import ResultStore
 
 """
 This module visualize proper sets for given `n`
@@ -17,43 +16,36 @@ Visual guidelines in a form of vertical lines separating each 4 examples are add
 
 def create_matrix(n, sets):
 
-    matrix = np.zeros((len(sets), n // 2), dtype=int)
-    for ii, (set_, m_, i, counts) in enumerate(sets):
-        for x in set_[:len(set_) // 2]:
-            matrix[ii, x - 1] = 1
-
-    matrix = sort_matrix(matrix)
+    matrix = sort_rows(occurrence_matrix(first_halves(sets), n // 2))
 
     return matrix.T
 
 
-def sort_matrix(matrix):
+def plot_proper_matrix(matrix):
+
+    fig = plt.figure()
+    sns.heatmap(matrix, cbar=False, square=True, yticklabels=range(1, len(matrix) + 1))
+    plt.xticks([])
+
+    # guidelines
+    ax = plt.gca()
+    ax.vlines(range(4, matrix.shape[1], 4), *ax.get_ylim())
 
-    matrix = [''.join(map(str, x)) for x in matrix]
-    matrix = np.array([list(map(int, x)) for x in sorted(matrix)])
+    plt.tight_layout()
 
-    return matrix
+    return fig
 
 
 def main():
 
     n = 58
 
-    with Path(f'../data/results_proper_62.pickle').open('rb') as f:
-        result = pickle.load(f)
+    store = ResultStore('../data/results_proper_62')
 
-    _, sets, _ = result[n]
+    _, sets, _ = store.result(n)
     matrix = create_matrix(n, sets)
 
-    plt.figure()
-    sns.heatmap(matrix, cbar=False, square=True, yticklabels=range(1, len(matrix) + 1))
-    plt.xticks([])
-
-    # guidelines
-    ax = plt.gca()
-    ax.vlines(range(4, matrix.shape[1], 4), *ax.get_ylim())
-
-    plt.tight_layout()
+    plot_proper_matrix(matrix)
 
     plt.savefig(f'../images/proper_matrix_{n}.pdf')
     plt.show()
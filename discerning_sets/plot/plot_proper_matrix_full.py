@@ -1,61 +1,47 @@
-import pickle
 from collections import defaultdict
-from pathlib import Path
 
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from discerning_sets.analyze.cooccurrence import occurrence_matrix
+from discerning_sets.canonical import sort_rows, unique_translations
+from discerning_sets.store import ResultStore
+
 """
 This module plots proper matrix similar to the one in `plot_proper_matrix.py`,
 but it takes into account all canonical sets. Sets are divided into groups, separated by vertical lines.
 First, all asymmetric sets are plotted. 
 Every other group consists of sets with the same sum.
+Sets equal up to translation are plotted only once (see `canonical.py`).
 """
 
 
-def sort_matrix(matrix):
-
-    matrix = [''.join(map(str, x)) for x in matrix]
-    matrix = np.array([list(map(int, x)) for x in sorted(matrix)])
-
-    return matrix
-
-
 def main():
 
-    with Path(f'../data/results_34.pickle').open('rb') as f:
-        result = pickle.load(f)
+    store = ResultStore('../data/results_34')
 
-    result = {n: result[n] for n in [28]}
+    result = {n: store.result(n) for n in [28]}
 
     for n, (m, examples, _) in result.items():
 
         print(n, m, len(examples))
-        canonical = []
-        canonical_diff = set()
+        sets = [ex for ex, _, _, _ in examples]
+        canonical = [sets[idx] for idx in unique_translations(sets, n)]
 
         idxs = defaultdict(list)
-        for ex, _, _, _ in examples:
-            diff = tuple(next_ - prev for prev, next_ in zip(ex[:-1], ex[1:]))
-            if diff not in canonical_diff:
-                canonical.append(ex)
-                canonical_diff.add(diff)
-
-                ss = {ex[len(ex) - i - 1] + ex[i] for i in range(len(ex) // 2)}
-                if len(ss) == 1:
-                    idxs[ex[len(ex) - 1] + ex[0]].append(len(canonical) - 1)
-                else:
-                    idxs[-1].append(len(canonical) - 1)
-
-        matrix = np.zeros((len(canonical), n), dtype=int)
-        for ii, example in enumerate(canonical):
-            for x in example:
-                matrix[ii, x - 1] = 1
+        for idx, ex in enumerate(canonical):
+            ss = {ex[len(ex) - i - 1] + ex[i] for i in range(len(ex) // 2)}
+            if len(ss) == 1:
+                idxs[ex[len(ex) - 1] + ex[0]].append(idx)
+            else:
+                idxs[-1].append(idx)
+
+        matrix = occurrence_matrix(canonical, n)
 
         matricies = []
         for ss, idxs_ in sorted(idxs.items()):
-            matricies.append(sort_matrix(matrix[idxs_, :]))
+            matricies.append(sort_rows(matrix[idxs_, :]))
 
         matrix = np.vstack(matricies)
         # indicies = [idx for idx in [1, 8, 10, 12, 17, 26] if idx < matrix.shape[1]]
@@ -1,10 +1,10 @@
-import pickle
-from pathlib import Path
-
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from discerning_sets.analyze.cooccurrence import first_halves, occurrence_matrix
+from discerning_sets.canonical import sort_rows
+from discerning_sets.store import ResultStore
 
 """
 This module visualize proper matrices for given interval of ns combined together in one figure.
@@ -14,24 +14,11 @@ Smaller matrices are padded with zeros to preserve symmetry.
 
 def create_matrix(n, sets):
 
-    matrix = np.zeros((len(sets), n // 2), dtype=int)
-    for ii, (set_, m_, i, counts) in enumerate(sets):
-        for x in set_[:len(set_) // 2]:
-            matrix[ii, x - 1] = 1
-
-    matrix = sort_matrix(matrix)
+    matrix = sort_rows(occurrence_matrix(first_halves(sets), n // 2))
 
     return matrix.T
 
 
-def sort_matrix(matrix):
-
-    matrix = [''.join(map(str, x)) for x in matrix]
-    matrix = np.array([list(map(int, x)) for x in sorted(matrix)])
-
-    return matrix
-
-
 def main():
 
     n_from = 33
@@ -39,8 +26,7 @@ def main():
 
     ns = range(n_from, n_to + 1)
 
-    with Path(f'../data/results_proper_62.pickle').open('rb') as f:
-        result = pickle.load(f)
+    store = ResultStore('../data/results_proper_62')
 
     matrices = []
     sizes = []
@@ -48,7 +34,7 @@ def main():
     n_rows = n_to // 2
 
     for n in ns:
-        _, sets, _ = result[n]
+        _, sets, _ = store.result(n)
 
         matrix = create_matrix(n, sets)
         matrix = np.vstack((matrix, np.zeros((n_rows - matrix.shape[0], matrix.shape[1]))))
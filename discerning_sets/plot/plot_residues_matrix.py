@@ -1,10 +1,9 @@
-import pickle
-from pathlib import Path
-
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 from discerning_sets.plot.plot_proper_matrix import create_matrix
+from discerning_sets.store import ResultStore
 
 """
 This modules plots colorful example matrix, where to each number present in example we assign its residue group.
@@ -12,22 +11,99 @@ We can see that due to the sum requirement |R_s(m, i)| = |R_s'(m, i)| + |R_s'(m,
 where `s'` is smaller half of `s` and `sum` is the sum in this subset. Thus, we unite residues `i` and `(sum - i) % m`
 into one group and say that is should have even cardinality in s' or i == (sum - i) % m for each non-maximal `m`.
 We plot those matrices for every m from 3 to maximal one and trying to find some pattern in them.
+Residue matrices are computed from the example matrix (see `plot_proper_matrix.create_matrix`) at once per m.
 """
 
 
+def residue_groups(sum_, m):
+    """
+    Residues representing groups {j, (sum_ - j) % m} and the index of the group of every residue.
+    """
+    residues = [j for j in range(m) if j <= (sum_ - j) % m]
+    groups = {res: j for j, res in enumerate(residues)}
+    groups.update({j: groups[(sum_ - j) % m] for j in range(m) if j > (sum_ - j) % m})
+
+    return residues, np.array([groups[j] for j in range(m)])
+
+
+def residues_matrix(n, matrix, m):
+    """
+    Colors of residue groups modulo `m` of numbers present in examples (0 for no number).
+    The first half of examples (columns) has sum n, the second one n + 1, and their colors are separated by one.
+    Returns the matrix and residues representing groups for both sums.
+    """
+    residues_n, groups_n = residue_groups(n, m)
+    residues_n1, groups_n1 = residue_groups(n + 1, m)
+
+    # offset = 1 to save color for no number (0)
+    # offset = 1 (no number) + len(residues_n) (used colors) + 1 (separator)
+    row_residues = (np.arange(matrix.shape[0]) + 1) % m
+    colors_n = groups_n[row_residues] + 1
+    colors_n1 = groups_n1[row_residues] + 2 + len(residues_n)
+
+    first = np.arange(matrix.shape[1]) < matrix.shape[1] // 2
+    colors = np.where(first[None, :], colors_n[:, None], colors_n1[:, None])
+
+    return np.where(matrix == 1, colors, matrix), residues_n, residues_n1
+
+
+def plot_residues_matrix(n, matrix, m):
+
+    residues, residues_n, residues_n1 = residues_matrix(n, matrix, m)
+
+    # custom colormap - different color for each residue group, white for 0 (no number)
+    # and as a separator between groups in colorbar
+    n_colors = 1 + len(residues_n) + 1 + len(residues_n1)
+    cmap = sns.color_palette('tab20', n_colors - 2)
+    cmap = [(1, 1, 1)] + cmap[:len(residues_n)] + [(1, 1, 1)] + cmap[len(residues_n):]
+
+    # custom labels representing groups of residues "i + (sum - i) % m"
+    tick_labels = []
+    for j in residues_n:
+        tick_labels.append(f'{j}+{(n - j) % m}')
+    for j in residues_n1:
+        tick_labels.append(f'{j}+{(n + 1 - j) % m}')
+
+    fig = plt.figure()
+
+    # heatmap
+    ax = sns.heatmap(
+        residues,
+        cbar=True, cbar_kws={'ticks': range(n_colors), 'orientation': 'horizontal'},
+        square=True, linewidths=1,
+        xticklabels=False, yticklabels=range(1, len(matrix) + 1), cmap=cmap
+    )
+
+    # colorbar with custom labels at the center of each color bar (except for the first and separator)
+    cbar = ax.collections[0].colorbar
+    ticks = [
+        (n_colors - 1) / (2 * n_colors) + (n_colors - 1) / n_colors * i
+        for i in range(n_colors)
+        if i not in [0, len(residues_n) + 1]
+    ]
+    cbar.ax.set_xticks(ticks=ticks, labels=tick_labels, fontsize=6)
+
+    # title & y-labels
+    plt.title(f'{n}: m={m}')
+    plt.yticks(fontsize=6)
+
+    plt.tight_layout()
+
+    return fig
+
+
 def main():
 
     n = 58
 
-    with Path(f'../data/results_proper_62.pickle').open('rb') as f:
-        result = pickle.load(f)
+    store = ResultStore('../data/results_proper_62')
 
-    m, examples, _ = result[n]
+    m, examples, _ = store.result(n)
 
     matrix = create_matrix(n, examples)
-    n_ex = matrix.shape[1]
 
     # full matrix
+    # n_ex = matrix.shape[1]
     # first = matrix[:, :n_ex // 2]
     # second = matrix[:, n_ex // 2:]
     #
@@ -36,66 +112,7 @@ def main():
     # matrix = np.hstack([first, second])
 
     for i in range(3, m + 1):
-
-        # find residue groups for each half of examples and assign colors to them
-        residues_n = [j for j in range(i) if j <= (n - j) % i]
-        colors_n = {res: j for j, res in enumerate(residues_n)}
-        colors_n.update({j: colors_n[(n - j) % i] for j in range(i) if j > (n - j) % i})
-
-        # offset = 1 to save color for no number (0)
-        colors_n = {j: c + 1 for j, c in colors_n.items()}
-
-        residues_n1 = [j for j in range(i) if j <= (n + 1 - j) % i]
-        colors_n1 = {res: j for j, res in enumerate(residues_n1)}
-        colors_n1.update({j: colors_n1[(n + 1 - j) % i] for j in range(i) if j > (n + 1 - j) % i})
-
-        # offset = 1 (no number) + len(residues_n) (used colors) + 1 (separator)
-        colors_n1 = {j: c + 2 + len(residues_n) for j, c in colors_n1.items()}
-
-        residues = matrix.copy()
-        for j in range(matrix.shape[0]):
-            for k in range(matrix.shape[1]):
-                if residues[j][k] == 1:
-                    residue = (j + 1) % i
-                    residues[j][k] = colors_n[residue] if k < n_ex // 2 else colors_n1[residue]
-
-        # custom colormap - different color for each residue group, white for 0 (no number)
-        # and as a separator between groups in colorbar
-        n_colors = 1 + len(residues_n) + 1 + len(residues_n1)
-        cmap = sns.color_palette('tab20', n_colors - 2)
-        cmap = [(1, 1, 1)] + cmap[:len(residues_n)] + [(1, 1, 1)] + cmap[len(residues_n):]
-
-        # custom labels representing groups of residues "i + (sum - i) % m"
-        tick_labels = []
-        for j in residues_n:
-            tick_labels.append(f'{j}+{(n - j) % i}')
-        for j in residues_n1:
-            tick_labels.append(f'{j}+{(n + 1 - j) % i}')
-
-        plt.figure()
-
-        # heatmap
-        ax = sns.heatmap(
-            residues,
-            cbar=True, cbar_kws={'ticks': range(n_colors), 'orientation': 'horizontal'},
-            square=True, linewidths=1,
-            xticklabels=False, yticklabels=range(1, len(matrix) + 1), cmap=cmap
-        )
-
-        # colorbar with custom labels at the center of each color bar (except for the first and separator)
-        cbar = ax.collections[0].colorbar
-        ticks = [
-            (n_colors - 1) / (2 * n_colors) + (n_colors - 1) / n_colors * i
-            for i in range(n_colors)
-            if i not in [0, len(residues_n) + 1]
-        ]
-        cbar.ax.set_xticks(ticks=ticks, labels=tick_labels, fontsize=6)
-
-        # title & y-labels
-        plt.title(f'{n}: m={i}')
-        plt.yticks(fontsize=6)
-
-        plt.tight_layout()
+        plot_residues_matrix(n, matrix, i)
 
     plt.show()
 
@@ -0,0 +1,156 @@
+import os
+from multiprocessing import Pool
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from discerning_sets.plot.plot_connections import connection_weights, plot_connections
+from discerning_sets.plot.plot_intervals import count_intervals, plot_intervals
+from discerning_sets.plot.plot_occurrences import plot_occurrences
+from discerning_sets.plot.plot_proper_matrix import create_matrix, plot_proper_matrix
+from discerning_sets.plot.plot_residues_matrix import plot_residues_matrix
+from discerning_sets.store import ResultStore
+
+"""
+This module renders figures of the plot modules for a range of ns without opening any window (Agg backend).
+Every figure is one task and tasks are rendered in a process pool, figures are saved to `images`.
+
+Matrices computed from examples are cached in `cache` as `.npy` files keyed by the input store and n,
+a cached matrix is recomputed only if the store was written after it.
+Running this module regenerates all figures for the proper sets.
+"""
+
+
+FIGURES = ['proper', 'residues', 'intervals', 'occurrences', 'connections']
+
+
+def cached(source, cache, name, compute):
+    """
+    Matrix `name` computed from the store in `source` by `compute`, loaded from `cache` if it is up-to-date.
+    """
+    path = Path(cache) / Path(source).name / f'{name}.npy'
+    index = Path(source) / 'index.pickle'
+
+    if path.exists() and path.stat().st_mtime >= index.stat().st_mtime:
+        return np.load(path)
+
+    matrix = compute()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'{path.stem}.{os.getpid()}.tmp.npy')
+    np.save(tmp, matrix)
+    os.replace(tmp, path)
+
+    return matrix
+
+
+def proper_matrix(source, cache, n):
+
+    def compute():
+        _, examples, _ = ResultStore(source).result(n)
+        return create_matrix(n, examples)
+
+    return cached(source, cache, f'proper_{n}', compute)
+
+
+def connections(source, cache, n):
+
+    def compute():
+        weights = connection_weights({n: ResultStore(source).result(n)})
+        return np.array([(x, y, value) for (x, y), value in weights.items()]).reshape(-1, 3)
+
+    weights = cached(source, cache, f'connections_{n}', compute)
+
+    return {(int(x), int(y)): value for x, y, value in weights.tolist()}
+
+
+def tasks(source, figures, ns):
+    """
+    Tasks (figure, ns or n and optionally m) rendering chosen `figures`.
+    """
+    store = ResultStore(source)
+    ns = [n for n in ns if n in store.index]
+
+    for figure in figures:
+        if figure in ['intervals', 'occurrences']:
+            yield figure, tuple(ns)
+        elif figure == 'residues':
+            yield from ((figure, n, m) for n in ns for m in range(3, store.index[n]['max_m'] + 1))
+        else:
+            yield from ((figure, n) for n in ns)
+
+
+def render(task, source, cache, images):
+
+    figure, *args = task
+
+    if figure == 'proper':
+        n, = args
+        fig = plot_proper_matrix(proper_matrix(source, cache, n))
+        name = f'proper_matrix_{n}'
+
+    elif figure == 'residues':
+        n, m = args
+        fig = plot_residues_matrix(n, proper_matrix(source, cache, n), m)
+        name = f'residues_matrix_{n}_{m}'
+
+    elif figure == 'intervals':
+        ns, = args
+        n_intervals = [count_intervals(proper_matrix(source, cache, n)) for n in ns]
+        fig = plot_intervals(ns, [min(x) for x in n_intervals], [max(x) for x in n_intervals])
+        name = f'intervals_{ns[0]}_{ns[-1]}'
+
+    elif figure == 'occurrences':
+        ns, = args
+        store = ResultStore(source)
+        fig = plot_occurrences({n: store.result(n) for n in ns})
+        name = f'occurrences_{ns[0]}_{ns[-1]}'
+
+    elif figure == 'connections':
+        n, = args
+        fig = plot_connections(connections(source, cache, n))
+        name = f'connections_n_{n}'
+
+    else:
+        raise ValueError(f'Unknown figure `{figure}`')
+
+    path = Path(images) / f'{name}.pdf'
+    fig.savefig(path)
+    plt.close(fig)
+
+    return path
+
+
+def render_all(source, figures, ns, images, cache, processes=None):
+    """
+    Render chosen `figures` for `ns` from the store in `source` serially or in a pool of `processes` processes.
+    Returns paths of saved figures.
+    """
+    Path(images).mkdir(parents=True, exist_ok=True)
+
+    tasks_ = list(tasks(source, figures, ns))
+    arguments = [(task, source, cache, images) for task in tasks_]
+
+    if processes is None:
+        return [render(*args) for args in arguments]
+
+    with Pool(processes) as pool:
+        return pool.starmap(render, arguments, chunksize=1)
+
+
+def main():
+
+    source = '../data/results_proper_62'
+    ns = range(6, 63)
+
+    paths = render_all(source, FIGURES, ns, images='../images', cache='../data/cache', processes=os.cpu_count())
+
+    print(f'{len(paths)} figures rendered')
+
+
+if __name__ == '__main__':
+    main()
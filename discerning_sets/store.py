@@ -0,0 +1,135 @@
+import pickle
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+
+from discerning_sets.generate.checkpoint import load_results
+from discerning_sets.generate.residues import residue_counts
+
+"""
+This module stores generated examples in a columnar format instead of nested tuples in pickles.
+For each n, examples are kept as a packed bit matrix in `examples_{n}.npy` - one row per set,
+bit x - 1 of the row is set iff x is in the set (`np.packbits` layout). The matrix is memory-mapped on load,
+so looking at one n touches only its own file.
+Small `index.pickle` keeps for each n: max_m, c, number of rows, row width in bytes
+and per-example `m` and `i` (-1 stands for None).
+
+`ResultStore.result(n)` returns (max_m, examples, c) in the same format as the pickles,
+where examples are a lazy sequence creating (s, m, i, counts) only for accessed rows.
+Generators add every finished n to the store in their directory (`data/results`, `data/results_proper`).
+Running this module converts the pickles from `data` to the store - both the cumulative ones
+and directories of per-n pickles written by the generators (see `generate/checkpoint.py`).
+"""
+
+
+class Examples(Sequence):
+
+    def __init__(self, n, rows, ms, is_):
+
+        self.n = n
+        self.rows = rows
+        self.ms = ms
+        self.is_ = is_
+
+    def __len__(self):
+
+        return len(self.rows)
+
+    def __getitem__(self, k):
+
+        if isinstance(k, slice):
+            return [self[j] for j in range(*k.indices(len(self)))]
+
+        s = tuple((np.flatnonzero(np.unpackbits(self.rows[k], count=self.n)) + 1).tolist())
+        m, i = int(self.ms[k]), int(self.is_[k])
+
+        if m < 0:
+            return s, None, None, None
+
+        return s, m, i, residue_counts(s, m)
+
+
+class ResultStore:
+
+    def __init__(self, directory):
+
+        self.directory = Path(directory)
+        self.index_path = self.directory / 'index.pickle'
+
+        if self.index_path.exists():
+            with self.index_path.open('rb') as f:
+                self.index = pickle.load(f)
+        else:
+            self.index = {}
+
+    def ns(self):
+
+        return sorted(self.index)
+
+    def write(self, result):
+        """
+        Add results in the pickle format n -> (max_m, examples, c), existing ns are replaced.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        for n, (max_m, examples, c) in result.items():
+            matrix = np.zeros((len(examples), n), dtype=bool)
+            for row, (s, *_) in enumerate(examples):
+                matrix[row, np.array(s) - 1] = True
+
+            rows = np.packbits(matrix, axis=1)
+            np.save(self.directory / f'examples_{n}.npy', rows)
+
+            self.index[n] = {
+                'max_m': max_m,
+                'c': c,
+                'rows': len(examples),
+                'width': rows.shape[1],
+                'm': np.array([-1 if m is None else m for _, m, _, _ in examples], dtype=np.int16),
+                'i': np.array([-1 if i is None else i for _, _, i, _ in examples], dtype=np.int16),
+            }
+
+        with self.index_path.open('wb') as f:
+            pickle.dump(self.index, f)
+
+    def rows(self, n):
+        """
+        Packed bit matrix of examples for `n` (memory-mapped).
+        """
+        return np.load(self.directory / f'examples_{n}.npy', mmap_mode='r')
+
+    def matrix(self, n):
+        """
+        Unpacked 0/1 matrix of examples for `n`, column x - 1 corresponds to element x.
+        """
+        return np.unpackbits(self.rows(n), axis=1, count=n)
+
+    def examples(self, n):
+
+        entry = self.index[n]
+
+        return Examples(n, self.rows(n), entry['m'], entry['i'])
+
+    def result(self, n):
+
+        entry = self.index[n]
+
+        return entry['max_m'], self.examples(n), entry['c']
+
+
+def main():
+
+    for name in ['results_34', 'results_proper_62']:
+        with Path(f'data/{name}.pickle').open('rb') as f:
+            result = pickle.load(f)
+
+        ResultStore(f'data/{name}').write(result)
+
+    for name in ['results', 'results_proper']:
+        if Path(f'data/{name}').exists():
+            ResultStore(f'data/{name}').write(load_results(f'data/{name}'))
+
+
+if __name__ == '__main__':
+    main()
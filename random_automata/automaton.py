@@ -1,8 +1,8 @@
-from typing import Any, Iterable
+from typing import Iterable
 import numpy as np
 
 """
-This module describes `Automaton` class and provides several functions 
+This module describes `Automaton` class and provides several functions
 to create automaton (permutation, random and others).
 """
 
@@ -11,80 +11,245 @@ class Automaton:
     """
     This class describes a simple automaton over {0, 1} alphabet.
     For now we only need two parts of classic DFA description: initial state and transition function.
-    List of all states can be deducted from the transition function.
+    States are integers 0..n-1 and the transition function is stored as an (n, 2) integer table.
     For given w, we need to decide in which state automaton will finish its work - this is done by `process` method.
     """
 
     @classmethod
-    def f_from_lists(cls, states: list, transitions0: list, transitions1: list):
+    def f_from_lists(cls, transitions0: Iterable, transitions1: Iterable) -> np.ndarray:
         """
-        On input, we have list of states [q0, q1, ...] and two list of transitions:
-        [f(q0, 0), f(q1, 0), ...] and [f(q0, 1), f(q1, 1), ...].
+        On input, we have two list of transitions for states 0, 1, ..., n - 1:
+        [f(0, 0), f(1, 0), ...] and [f(0, 1), f(1, 1), ...].
         We output transition function in format needed for `Automaton` creation:
         f[q] = (f(q, 0), f(q, 1))
         """
-        return dict(zip(states, zip(transitions0, transitions1)))
+        return np.column_stack((transitions0, transitions1)).astype(np.intp)
 
-    def __init__(self, q0: Any, f: dict[Any, tuple[Any, Any]]):
+    def __init__(self, q0: int, f: np.ndarray):
         """
         :param q0: initial state
-        :param f: transition function: for every state it determines two states where one can get by 0/1
+        :param f: transition table of shape (n, 2): for every state it determines two states where one can get by 0/1
         """
         self.q0 = q0
-        self.f = f
+        self.f = np.asarray(f, dtype=np.intp)
+        # plain lists make per-symbol indexing much cheaper than numpy scalar access
+        self._rows = self.f.tolist()
 
-        self.states = list(f)
+        self.states = range(len(self.f))
+        self._blocks = []
 
-    def process(self, w: Iterable, q=None):
+    def process(self, w: Iterable, q: int = None) -> int:
 
         if q is None:
             q = self.q0
 
-        for a in w:
-            q = self.f[q][int(a)]
+        f = self._rows
+        for a in np.asarray(w, dtype=np.intp).tolist():
+            q = f[q][a]
 
         return q
 
+    def process_pair(self, x: Iterable, y: Iterable, q: int = None) -> tuple[int, int]:
+        """
+        Process both words of the pair starting in `q` (initial state by default).
+        The common prefix is processed only once and the words are followed separately
+        only from the first position where they differ.
+        If both runs meet in the same state after the last difference, the rest is processed only once too.
+        """
+        if q is None:
+            q = self.q0
+
+        x = np.asarray(x, dtype=np.intp)
+        y = np.asarray(y, dtype=np.intp)
+
+        diff = np.flatnonzero(x != y)
+        if not len(diff):
+            q = self.process(x, q=q)
+            return q, q
+
+        first, last = diff[0], diff[-1] + 1
+
+        f = self._rows
+        for a in x[:first].tolist():
+            q = f[q][a]
+
+        q_x = q_y = q
+        for a, b in zip(x[first:last].tolist(), y[first:last].tolist()):
+            q_x = f[q_x][a]
+            q_y = f[q_y][b]
+
+        # after the last difference words are identical, so merged runs stay merged
+        tail = x[last:].tolist()
+        for k, a in enumerate(tail):
+            if q_x == q_y:
+                q = self.process(tail[k:], q=q_x)
+                return q, q
+
+            q_x = f[q_x][a]
+            q_y = f[q_y][a]
+
+        return q_x, q_y
+
+    def process_all_states(self, w: Iterable) -> np.ndarray:
+        """
+        Process `w` from every state at once.
+        We apply the letter maps to the whole vector of current states, so the cost is O(|w|) vectorized steps.
+        Returns an array `q` where q[s] is the state in which automaton finishes its work started in state `s`.
+        """
+        letters = self.f[:, 0], self.f[:, 1]
+
+        q = np.arange(len(self.f))
+        for a in np.asarray(w, dtype=np.intp).tolist():
+            q = letters[a][q]
+
+        return q
+
+    def block_tables(self, k: int) -> list[np.ndarray]:
+        """
+        Compute state maps induced by all words of length up to `k`.
+        Returns list `tables`, where tables[j] has shape (2^j, n) and tables[j][b] is the map Q -> Q
+        induced by the word of length `j` with binary value `b` (its first symbol is the most significant bit).
+        Tables are computed by doubling the number of words with each additional symbol and are cached.
+        """
+        n = len(self.f)
+
+        if not self._blocks:
+            self._blocks.append(np.arange(n).reshape((1, n)))
+
+        while len(self._blocks) <= k:
+            # word `b` followed by symbol `a` gets value 2b + a
+            prev = self._blocks[-1]
+            self._blocks.append(np.moveaxis(self.f[prev], 2, 1).reshape((-1, n)))
+
+        return self._blocks[:k + 1]
+
+    def transformation(self, w: Iterable, k: int = 8) -> np.ndarray:
+        """
+        Compile `w` into the state map Q -> Q it induces.
+        Word is processed by blocks of `k` symbols, each of them is one lookup into precomputed `block_tables`,
+        so we need only |w| / k compositions of maps.
+        Returns an array `g` where g[s] is the state in which automaton finishes its work started in state `s`
+        (the same as `process_all_states`).
+        """
+        w = np.asarray(w, dtype=np.intp)
+        tables = self.block_tables(k)
+
+        n_blocks, rest = divmod(len(w), k)
+        weights = 1 << np.arange(k)[::-1]
+        values = w[:n_blocks * k].reshape((n_blocks, k)) @ weights
+
+        g = tables[0][0]
+        for b in values.tolist():
+            g = tables[k][b][g]
+
+        if rest:
+            b = int(w[n_blocks * k:] @ weights[k - rest:])
+            g = tables[rest][b][g]
+
+        return g
+
+    def _apart_runs(self, x: np.ndarray, y: np.ndarray, k: int):
+        """
+        Run x and y in the product automaton from all initial states (q, q) at once.
+        Runs are stored as an array of shape (2, p) of distinct pairs of states (q_x, q_y + n),
+        and `index[s]` is the pair followed from the initial state `s`.
+        The common prefix is processed once for all states. After the last difference words are identical,
+        so runs which met stay together - every `k` symbols we drop them (their index is -1)
+        and stop as soon as no runs are apart.
+        Returns `index` of the pairs finishing in different states, or None if there are no such pairs.
+        """
+        n = len(self.f)
+        letters = self.f[:, 0], self.f[:, 1]
+        # two copies of states, steps[a][b] reads `a` in the first copy (x) and `b` in the second one (y),
+        # so every symbol is one lookup for all pairs
+        steps = [[np.concatenate((letters[a], letters[b] + n)) for b in range(2)] for a in range(2)]
+
+        diff = np.flatnonzero(x != y)
+        if not len(diff):
+            return None
+
+        first, last = diff[0], diff[-1] + 1
+
+        states, index = np.unique(self.process_all_states(x[:first]), return_inverse=True)
+        q = np.stack((states, states + n))
+
+        for a, b in zip(x[first:last].tolist(), y[first:last].tolist()):
+            q = steps[a][b][q]
+
+        tail = x[last:].tolist()
+        # the last block is empty, so the final pairs are checked too
+        for start in range(0, len(tail) + k, k):
+            apart = np.flatnonzero(q[0] + n != q[1])
+            if not len(apart):
+                return None
+
+            if len(apart) < q.shape[1]:
+                # extra last slot keeps index of already dropped runs at -1
+                position = np.full(q.shape[1] + 1, -1)
+                position[apart] = np.arange(len(apart))
+                index = position[index]
+                q = q[:, apart]
+
+            for a in tail[start:start + k]:
+                q = steps[a][a][q]
+
+        return index
+
+    def distinguishing_states(self, x: Iterable, y: Iterable, k: int = 32) -> np.ndarray:
+        """
+        Initial states starting in which automaton finishes x and y in different states (sorted array).
+        Both words are processed together in the product automaton (see `_apart_runs`),
+        the same as comparing `process_all_states` of x and y.
+        """
+        index = self._apart_runs(np.asarray(x, dtype=np.intp), np.asarray(y, dtype=np.intp), k)
+        if index is None:
+            return np.empty(0, dtype=np.intp)
+
+        return np.flatnonzero(index >= 0)
+
+    def has_distinguishing_state(self, x: Iterable, y: Iterable, k: int = 32) -> bool:
+        """
+        Decide whether some initial state distinguishes x and y (`distinguishing_states` is not empty).
+        """
+        return self._apart_runs(np.asarray(x, dtype=np.intp), np.asarray(y, dtype=np.intp), k) is not None
 
-def random_automaton(n):
 
-    states = list(range(n))
-    transitions0 = list(np.random.randint(n, size=n))
-    transitions1 = list(np.random.randint(n, size=n))
+def random_automaton(n, rng=None):
 
-    f = Automaton.f_from_lists(states, transitions0, transitions1)
+    rng = np.random.default_rng(rng)
+    f = rng.integers(n, size=(n, 2))
 
     return Automaton(0, f)
 
 
-def permutation_automaton(n):
+def permutation_automaton(n, rng=None):
 
-    states = list(range(n))
-    transitions0 = list(np.random.permutation(n))
-    transitions1 = list(np.random.permutation(n))
+    rng = np.random.default_rng(rng)
+    transitions0 = rng.permutation(n)
+    transitions1 = rng.permutation(n)
 
-    f = Automaton.f_from_lists(states, transitions0, transitions1)
+    f = Automaton.f_from_lists(transitions0, transitions1)
 
     return Automaton(0, f)
 
 
-def increased_permutation_automaton(n):
+def increased_permutation_automaton(n, rng=None):
 
-    states = list(range(n))
-    transitions0 = list(np.random.permutation(n))
-    transitions1 = [(t + 1) % n for t in transitions0]
+    rng = np.random.default_rng(rng)
+    transitions0 = rng.permutation(n)
+    transitions1 = (transitions0 + 1) % n
 
-    f = Automaton.f_from_lists(states, transitions0, transitions1)
+    f = Automaton.f_from_lists(transitions0, transitions1)
 
     return Automaton(0, f)
 
 
-def shifted_permutation_automaton(n):
+def shifted_permutation_automaton(n, rng=None):
 
-    states = list(range(n))
-    transitions0 = list(np.random.permutation(n))
-    transitions1 = transitions0[1:] + transitions0[:1]
+    rng = np.random.default_rng(rng)
+    transitions0 = rng.permutation(n)
+    transitions1 = np.roll(transitions0, -1)
 
-    f = Automaton.f_from_lists(states, transitions0, transitions1)
+    f = Automaton.f_from_lists(transitions0, transitions1)
 
     return Automaton(0, f)
@@ -0,0 +1,125 @@
+from typing import Iterable
+import numpy as np
+
+"""
+This module processes words through many random automata at once.
+A batch of automata of the same size is described by a tensor of transition tables
+of shape (size, n, 2), where tables[k] is the transition table of k-th automaton (see `Automaton`).
+All automata start in the same initial state and a word is walked through all of them together.
+Table factories draw from the given `numpy.random.Generator` (or a fresh one).
+"""
+
+
+def permutations(n, size, rng=None):
+
+    rng = np.random.default_rng(rng)
+
+    return rng.permuted(np.broadcast_to(np.arange(n), (size, n)), axis=1)
+
+
+def random_tables(n, size, rng=None):
+
+    rng = np.random.default_rng(rng)
+
+    return rng.integers(n, size=(size, n, 2))
+
+
+def permutation_tables(n, size, rng=None):
+
+    rng = np.random.default_rng(rng)
+
+    return np.stack((permutations(n, size, rng), permutations(n, size, rng)), axis=2)
+
+
+def increased_permutation_tables(n, size, rng=None):
+
+    transitions0 = permutations(n, size, rng)
+    transitions1 = (transitions0 + 1) % n
+
+    return np.stack((transitions0, transitions1), axis=2)
+
+
+def shifted_permutation_tables(n, size, rng=None):
+
+    transitions0 = permutations(n, size, rng)
+    transitions1 = np.roll(transitions0, -1, axis=1)
+
+    return np.stack((transitions0, transitions1), axis=2)
+
+
+def flat_letters(tables):
+    """
+    Flatten the batch so that every state of every automaton has its own global index k * n + q.
+    We return one flat map per letter, which moves global indices to global indices,
+    so a step over the whole batch is a single `take`.
+    """
+    size, n, _ = tables.shape
+    offsets = (np.arange(size) * n)[:, None]
+
+    return tuple((tables[:, :, a] + offsets).ravel() for a in (0, 1))
+
+
+def process_batch(tables: np.ndarray, w: Iterable, q0: int = 0) -> np.ndarray:
+    """
+    Process `w` by every automaton in the batch starting in `q0`.
+    Returns an array with the final state of each automaton.
+    """
+    size, n, _ = tables.shape
+    letters = flat_letters(tables)
+
+    q = np.arange(size) * n + q0
+    for a in np.asarray(w, dtype=np.intp).tolist():
+        q = letters[a][q]
+
+    return q % n
+
+
+def process_pair_batch(
+        tables: np.ndarray, x: Iterable, y: Iterable, q0: int = 0, merge_check: int = 64
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Process both words of the pair by every automaton in the batch starting in `q0`.
+    Returns final states of all automata for `x` and for `y`.
+
+    The common prefix is processed only once and the words are followed separately only from the first difference.
+    After the last difference, `y` is followed only by automata where the runs have not met yet,
+    and this set is shrunk every `merge_check` symbols.
+    """
+    size, n, _ = tables.shape
+    letters = flat_letters(tables)
+
+    x = np.asarray(x, dtype=np.intp)
+    y = np.asarray(y, dtype=np.intp)
+
+    diff = np.flatnonzero(x != y)
+    if not len(diff):
+        q = process_batch(tables, x, q0=q0)
+        return q, q.copy()
+
+    first, last = diff[0], diff[-1] + 1
+
+    q = np.arange(size) * n + q0
+    for a in x[:first].tolist():
+        q = letters[a][q]
+
+    q_x = q_y = q
+    for a, b in zip(x[first:last].tolist(), y[first:last].tolist()):
+        q_x = letters[a][q_x]
+        q_y = letters[b][q_y]
+
+    apart = np.flatnonzero(q_x != q_y)
+    q_y = q_y[apart]
+
+    for k, a in enumerate(x[last:].tolist()):
+        if k % merge_check == 0:
+            still_apart = q_x[apart] != q_y
+            apart, q_y = apart[still_apart], q_y[still_apart]
+
+        q_x = letters[a][q_x]
+        q_y = letters[a][q_y]
+
+    q_x = q_x % n
+    result_y = q_x.copy()
+    result_y[apart] = q_y % n
+
+    return q_x, result_y
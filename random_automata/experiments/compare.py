@@ -5,11 +5,17 @@ from pathlib import Path
 import numpy as np
 import matplotlib.pyplot as plt
 
+from random_automata.experiments.runner import paired_difference
+
 """
 This script is used to compare different automata from multiple symbols experiments in one figure.
 It loads experiments' data and create a figure for each number of changes there with all tried automata.
 We store the figures in `images/compare_m_{m}_{n_changes}_{rand_suffix}.pdf`, 
 where suffix correspond to a suffix of input data.
+If the experiments were run with common random numbers, we also plot the differences to random automata
+with two standard errors estimated from paired per-word differences
+in `images/compare_difference_m_{m}_{n_changes}_{rand_suffix}.pdf`.
+Sizes where random automata were computed by the chain (`markov_ns`) are not sampled, so they are left out there.
 """
 
 
@@ -66,4 +72,27 @@ for i, n_change in enumerate(n_changes):
 
     plt.savefig(f'../images/compare_m_{m}_{n_change}_{rand_key}.pdf')
 
+    if not settings.get('common'):
+        continue
+
+    plt.figure(figsize=(8, 5.3))
+
+    for key, title, style in zip(keys[:-1], titles[:-1], styles[:-1]):
+
+        sampled = [j for j, n in enumerate(ns) if n not in settings.get('markov_ns', [])]
+        difference, error = paired_difference(result[key][i][sampled], result['random'][i][sampled], n_tries)
+        n_log = [math.log(ns[j]) for j in sampled]
+        plt.plot(n_log, difference, linestyle=style, marker='.', label=f'{title} - Random')
+        plt.fill_between(n_log, difference - 2 * error, difference + 2 * error, alpha=0.3)
+
+    plt.axhline(0, color='k', linestyle=':')
+
+    plt.legend()
+    plt.ylabel('Difference of ratios of distinguished pairs')
+    plt.xlabel('Size of automaton [log]')
+
+    plt.tight_layout()
+
+    plt.savefig(f'../images/compare_difference_m_{m}_{n_change}_{rand_key}.pdf')
+
 plt.show()
@@ -0,0 +1,144 @@
+import math
+from multiprocessing import Pool
+
+import numpy as np
+
+from random_automata.batch import process_pair_batch, random_tables
+from random_automata.markov import separation_probability
+from random_automata.words import unpack
+
+"""
+This module runs success rate experiments split into work units.
+An experiment is an automaton factory with word pairs (packed, see `words.py`), and it is evaluated
+for every automaton size `n` on every pair, giving `results[j, i]` - number of successful tries
+of the `j`-th size on the `i`-th pair.
+
+A work unit is one experiment, one size and a batch of consecutive pairs. Units of all experiments
+are scheduled together on a process pool, the most expensive ones (largest `n`) first,
+and chunks are sized to give every process about 4 of them, so all cores stay busy until the end.
+Every unit gets a child of the root seed (`SeedSequence.spawn`) and every pair in it draws its automata from
+its own `numpy.random.Generator` spawned from the unit's seed. Units are listed in a fixed order,
+so results depend only on the root seed - not on the number of processes or the scheduling,
+and a single unit can be re-run on its own.
+
+With common random numbers (`common`), units of different experiments with the same size and pairs share the seed.
+If the experiments also share their word pairs, all of them are evaluated on the same pairs and constructions
+drawing the same numbers are coupled (e.g. permutation and shifted permutation automata share the first permutation),
+so differences between experiments have much lower variance than with independent draws (see `paired_difference`).
+"""
+
+
+def separated_by_final_state(automaton, n, x, y, n_tries, rng):
+    """
+    Number of `n_tries` automata (batched tables from `automaton`) where x and y finish in different states.
+    """
+    q_x, q_y = process_pair_batch(automaton(n, n_tries, rng), x, y)
+
+    return np.count_nonzero(q_x != q_y)
+
+
+class ChainFastPath:
+    """
+    Evaluator like `separated_by_final_state`, which computes the expected number of successes of random automata
+    of sizes at least `min_n` by the chain from `markov.py` instead of sampling them.
+    Other automata and smaller sizes (where the chain is biased, see `markov.py`) are sampled.
+    """
+
+    def __init__(self, min_n=1000):
+
+        self.min_n = min_n
+
+    def __call__(self, automaton, n, x, y, n_tries, rng):
+
+        if automaton is random_tables and n >= self.min_n:
+            return n_tries * separation_probability(x, y, [n])[0]
+
+        return separated_by_final_state(automaton, n, x, y, n_tries, rng)
+
+
+def run_unit(unit):
+
+    (evaluate, name, automaton, j, n, start, xs, ys, word_len, n_tries), seed = unit
+
+    # children of the unit's seed, built directly since `spawn` would advance the (possibly shared) seed
+    rngs = [
+        np.random.default_rng(np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (k, )))
+        for k in range(len(xs))
+    ]
+    counts = [
+        evaluate(automaton, n, unpack(x, word_len), unpack(y, word_len), n_tries, rng)
+        for x, y, rng in zip(xs, ys, rngs)
+    ]
+
+    return name, j, start, counts
+
+
+def units(evaluate, experiments, word_len, ns, n_tries, batch):
+
+    for j, n in sorted(enumerate(ns), key=lambda item: -item[1]):
+        for name, (automaton, xs, ys) in experiments.items():
+            for start in range(0, len(xs), batch):
+                yield evaluate, name, automaton, j, n, start, xs[start:start + batch], ys[start:start + batch], \
+                    word_len, n_tries
+
+
+def seed_key(unit, common):
+    """
+    Units with the same key get the same seed.
+    """
+    _, name, _, j, _, start, *_ = unit
+
+    return (j, start) if common else (name, j, start)
+
+
+def run_experiments(
+        evaluate, experiments, word_len, ns, n_tries, processes=None, batch=10, seed=None, common=False
+):
+    """
+    Evaluate `experiments` (dictionary name -> (automaton, xs, ys)) serially (if `processes` is None)
+    or in a pool of `processes` processes.
+    `evaluate(automaton, n, x, y, n_tries, rng)` returns number of successful tries for one pair of (unpacked) words.
+    With `common`, experiments share random numbers for the same size and pairs.
+    Returns dictionary name -> `results[j, i]`.
+    """
+    results = {name: np.zeros((len(ns), len(xs))) for name, (_, xs, _) in experiments.items()}
+    units_ = list(units(evaluate, experiments, word_len, ns, n_tries, batch))
+
+    keys = [seed_key(unit, common) for unit in units_]
+    seeds = dict(zip(dict.fromkeys(keys), np.random.SeedSequence(seed).spawn(len(set(keys)))))
+    units_ = [(unit, seeds[key]) for unit, key in zip(units_, keys)]
+
+    step = math.ceil(len(units_) / 100)
+
+    def collect(finished):
+        for done, (name, j, start, counts) in enumerate(finished, 1):
+            results[name][j, start:start + len(counts)] = counts
+
+            if done % step == 0:
+                print(f'{done}/{len(units_)} units completed')
+
+    if processes is None:
+        collect(map(run_unit, units_))
+    else:
+        with Pool(processes) as pool:
+            collect(pool.imap_unordered(run_unit, units_, chunksize=max(1, len(units_) // (4 * processes))))
+
+    return results
+
+
+def paired_difference(results, other, n_tries):
+    """
+    Mean difference of success ratios of two experiments evaluated on the same pairs (for every size)
+    and its standard error estimated from per-pair differences.
+    """
+    differences = (results - other) / n_tries
+    n_words = differences.shape[1]
+
+    return differences.mean(axis=1), differences.std(axis=1, ddof=1) / math.sqrt(n_words)
+
+
+def new_seed():
+    """
+    Fresh root seed, short enough to name result files by it.
+    """
+    return int(np.random.SeedSequence().generate_state(1)[0])
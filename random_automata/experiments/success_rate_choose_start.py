@@ -1,4 +1,5 @@
 import math
+import os
 import pickle
 from pathlib import Path
 from time import time
@@ -10,6 +11,8 @@ from random_automata.automaton import (
     permutation_automaton, random_automaton,
     shifted_permutation_automaton
 )
+from random_automata.experiments.runner import new_seed, run_experiments
+from random_automata.words import random_pairs
 
 """
 In this module we compare success rate of different automata on word pairs with one or more symbol difference.
@@ -18,48 +21,35 @@ if we can choose one for automaton to be good. All other assumptions remain the
 
 For each `n` (automaton size) we compute overall success ratio and plot it for different number of changes. 
 Results of different automata are plotted in separate figures.
+Whether some initial state is good is decided by running both words in the product automaton from all states at once
+(see `Automaton.has_distinguishing_state`).
+All automata types, numbers of changes, sizes and words are evaluated in one process pool (see `runner.py`).
 
-We store the results together with settings of the experiment in `data/res_{m}_{random_suffix}_choose.pickle` 
+We store the results together with settings of the experiment in `data/res_{m}_{seed}_choose.pickle` 
 for reproducibility. We save the resulting graphs as 
-`images/experiment_m_{m}_{key}_{random_suffix}_choose.pdf` with the same suffix as corresponding data.
+`images/experiment_m_{m}_{key}_{seed}_choose.pdf` with the same seed as corresponding data.
 
 """
 
 
-def random_pair(m, n_changes):
+def separated_by_some_start(automaton, n, x, y, n_tries, rng):
+    """
+    Number of `n_tries` automata where some initial state leads x and y to different states.
+    """
+    successes = 0
+    for _ in range(n_tries):
+        if automaton(n, rng).has_distinguishing_state(x, y):
+            successes += 1
 
-    x = np.random.randint(2, size=m)
-    y = x.copy()
+    return successes
 
-    for i in np.random.choice(m, size=n_changes, replace=False):
-        y[i] = 1 - y[i]
 
-    return x, y
+def run_experiment(automaton, word_len, ns, n_words, n_tries, n_changes, processes=None, seed=None):
 
+    rng = np.random.default_rng(seed)
+    experiments = {None: (automaton, *random_pairs(word_len, n_changes, n_words, rng))}
 
-def run_experiment(automaton, word_len, ns, n_words, n_tries, n_changes):
-
-    results = np.zeros((len(ns), n_words))
-
-    for i in range(n_words):
-        ttt = time()
-
-        x, y = random_pair(word_len, n_changes)
-
-        for j, n in enumerate(ns):
-            for _ in range(n_tries):
-                M = automaton(n)
-                for s in M.states:
-                    q_x = M.process(x, q=s)
-                    q_y = M.process(y, q=s)
-
-                    if q_x != q_y:
-                        results[j, i] += 1
-                        break
-
-        print(f'{i}th word completed in {(time() - ttt):.2f}s')
-
-    return results
+    return run_experiments(separated_by_some_start, experiments, word_len, ns, n_tries, processes, seed=seed)[None]
 
 
 def plot_results(results, ns, n_words, n_tries, n_changes, style):
@@ -89,8 +79,12 @@ def main():
         'n': m,
     }
 
+    seed = new_seed()
+    rng = np.random.default_rng(seed)
+
     res = {
         'settings': {
+            'seed': seed,
             'm': m,
             'n_words': n_words,
             'n_tries': n_tries,
@@ -103,20 +97,25 @@ def main():
         'shifted_permutation': [],
     }
 
-    for n_change in n_changes:
-        print(f'Start `Permutation automaton` experiment ({n_change} changes)')
-        res['permutation'].append(run_experiment(permutation_automaton, m, ns, n_words, n_tries, n_change))
+    automata = {
+        'permutation': permutation_automaton,
+        'random': random_automaton,
+        'shifted_permutation': shifted_permutation_automaton,
+    }
+    experiments = {
+        (key, n_change): (automaton, *random_pairs(m, n_change, n_words, rng))
+        for n_change in n_changes for key, automaton in automata.items()
+    }
 
-        print(f'Start `Random automaton` experiment ({n_change} changes)')
-        res['random'].append(run_experiment(random_automaton, m, ns, n_words, n_tries, n_change))
+    print('Start experiments')
+    results = run_experiments(
+        separated_by_some_start, experiments, m, ns, n_tries, processes=os.cpu_count(), seed=seed
+    )
 
-        print(f'Start `Shifted permutation automaton` experiment ({n_change} changes)')
-        res['shifted_permutation'].append(
-            run_experiment(shifted_permutation_automaton, m, ns, n_words, n_tries, n_change)
-        )
+    for key in automata:
+        res[key] = [results[key, n_change] for n_change in n_changes]
 
-    rand_key = np.random.randint(10000)
-    path = Path(f'../data/res_{m}_{rand_key}_choose.pickle')
+    path = Path(f'../data/res_{m}_{seed}_choose.pickle')
     with open(path, 'wb') as f:
         pickle.dump(res, f)
 
@@ -143,7 +142,7 @@ def main():
 
         plt.tight_layout()
 
-        plt.savefig(f'../images/experiment_m_{m}_{key}_{rand_key}_choose.pdf')
+        plt.savefig(f'../images/experiment_m_{m}_{key}_{seed}_choose.pdf')
 
     plt.show()
 
@@ -1,6 +1,5 @@
 import math
 import pickle
-from functools import partial
 from multiprocessing import Pool
 from pathlib import Path
 from time import time
@@ -9,6 +8,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 from random_automata.automaton import shifted_permutation_automaton, permutation_automaton, random_automaton
+from random_automata.experiments.runner import new_seed
+from random_automata.sequential import per_look_confidence, resolve
+from random_automata.words import random_pair
 
 """
 In this module we are looking for minimal successful automaton size for a given percentage of changes in the word. 
@@ -16,30 +18,31 @@ We start from log(m) going up and looking for a border where for last 5 sizes
 `n_tries` generated automata were successful for all generated `n_words` words. 
 
 We may try different automaton constructions, but for now we stick to "shifted permutation automata".
+
+In sequential mode, a size is successful if its success rate is at least `threshold`.
+We sample it in batches and stop as soon as a confidence bound (Wilson or Clopper-Pearson) resolves the rate,
+and instead of the linear scan we gallop up from log(m) and binary search for the minimal successful size
+(which assumes that success rate grows with the size of automaton).
+Sizes not resolved within `max_trials` are not successful, so we find the minimal size resolved as successful,
+and the history records the decision (True, False or None for unresolved) of every tested size.
+
 We compute the results in parallel over words' lengths.
 We are trying different word lengths and plot the result.
 
-We store the resulting data in  `data/linear_{key}_{rand_key}.pickle`,
-and the resulting graph in `images/linear_{key}_{rand_key}.pdf`,
+We store the resulting data in  `data/linear_{key}_{seed}.pickle`,
+and the resulting graph in `images/linear_{key}_{seed}.pdf`,
 where key is the name of tried automata type (specified on input).
+Every (n_changes, m) task gets its own child of the root `seed` (`SeedSequence.spawn`),
+so the run is reproducible regardless of the order in which the pool runs the tasks.
 """
 
 
-def random_pair(m, n_changes):
-
-    x = np.random.randint(2, size=m)
-    y = x.copy()
-
-    for i in np.random.choice(m, size=n_changes, replace=False):
-        y[i] = 1 - y[i]
-
-    return x, y
-
-
-def run_experiment(automaton, word_len, n_words, n_tries, n_changes):
+def run_experiment(automaton, word_len, n_words, n_tries, n_changes, seed=None):
 
     print(f'Start experiment (m={word_len})')
 
+    rng = np.random.default_rng(seed)
+
     start = int(math.log(word_len))
     n_changes = int(word_len * n_changes)
 
@@ -57,17 +60,13 @@ def run_experiment(automaton, word_len, n_words, n_tries, n_changes):
         rate = 0
         for i in range(n_words):
 
-            x, y = random_pair(word_len, n_changes)
+            x, y = random_pair(word_len, n_changes, rng)
 
             for _ in range(n_tries):
-                M = automaton(n)
-                for s in M.states:
-                    q_x = M.process(x, q=s)
-                    q_y = M.process(y, q=s)
-
-                    if q_x != q_y:
-                        rate += 1
-                        break
+                # words are short here, so two passes over all states are cheaper than the product automaton
+                M = automaton(n, rng)
+                if np.any(M.process_all_states(x) != M.process_all_states(y)):
+                    rate += 1
                 else:
                     break
 
@@ -94,6 +93,74 @@ def run_experiment(automaton, word_len, n_words, n_tries, n_changes):
     return first_n, history, ns
 
 
+def test_size(automaton, n, word_len, n_changes, threshold, confidence, bound, batch, max_trials, rng):
+    """
+    Decide if size `n` is successful (True or False), or None if it is not resolved within `max_trials`.
+    The interval is checked after every batch, so the error is split among all possible looks.
+    """
+    successes = 0
+    trials = 0
+
+    confidence = per_look_confidence(confidence, math.ceil(max_trials / batch))
+
+    while trials < max_trials:
+        for _ in range(batch):
+            x, y = random_pair(word_len, n_changes, rng)
+            M = automaton(n, rng)
+            successes += int(np.any(M.process_all_states(x) != M.process_all_states(y)))
+
+        trials += batch
+
+        decision = resolve(successes, trials, threshold, confidence, bound)
+        if decision is not None:
+            return decision, successes, trials
+
+    return None, successes, trials
+
+
+def run_sequential_experiment(
+        automaton, word_len, n_changes,
+        threshold=0.999, confidence=0.99, bound='wilson', batch=1000, max_trials=1_000_000, seed=None
+):
+
+    print(f'Start sequential experiment (m={word_len})')
+
+    rng = np.random.default_rng(seed)
+    n_changes = int(word_len * n_changes)
+    tested = {}
+
+    def successful(n):
+        if n not in tested:
+            tested[n] = test_size(
+                automaton, n, word_len, n_changes, threshold, confidence, bound, batch, max_trials, rng
+            )
+        # size not resolved within the budget is not considered successful
+        return tested[n][0] is True
+
+    # galloping: double the step until we find successful size
+    failed = int(math.log(word_len)) - 1
+    n, step = failed + 1, 1
+    while not successful(n):
+        failed = n
+        n += step
+        step *= 2
+
+    # binary search for minimal successful size in (failed, n]
+    while n - failed > 1:
+        middle = (failed + n) // 2
+        if successful(middle):
+            n = middle
+        else:
+            failed = middle
+
+    ns = list(tested)
+    history = list(tested.values())
+
+    print(f'Finish m={word_len}, n={n}\nhistory: {history}')
+
+    return n, history, ns
+
+
 def main():
 
     automaton = shifted_permutation_automaton
@@ -102,28 +169,47 @@ def main():
     n_words = 10000
     n_tries = 100
 
+    sequential = False
+    threshold = 0.999
+    confidence = 0.99
+    bound = 'wilson'
+
     ms = range(10, 50, 5)
+    changes = [0.1, 0.2, 0.5, 0.7, 0.9, 1]
+
+    # every (n_changes, m) task has its own random stream
+    seed = new_seed()
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(changes) * len(ms)))
 
     result = {}
 
-    for n_changes in [0.1, 0.2, 0.5, 0.7, 0.9, 1]:
-        task = partial(
-            run_experiment,
-            automaton,
-            n_words=n_words, n_tries=n_tries, n_changes=n_changes
-        )
+    for n_changes in changes:
+        if sequential:
+            task = run_sequential_experiment
+            args = [
+                (automaton, m, n_changes, threshold, confidence, bound, 1000, n_words * n_tries, next(seeds))
+                for m in ms
+            ]
+        else:
+            task = run_experiment
+            args = [(automaton, m, n_words, n_tries, n_changes, next(seeds)) for m in ms]
 
         with Pool() as pool:
-            res = pool.map(task, ms)
+            res = pool.starmap(task, args)
 
         res, history, ns = zip(*res)
 
         result[n_changes] = {'res': res, 'history': history, 'ns': ns}
 
-    rand_key = np.random.randint(10000)
-    path = Path(f'../data/linear_{key}_{rand_key}.pickle')
+    path = Path(f'../data/linear_{key}_{seed}.pickle')
     with open(path, 'wb') as f:
-        pickle.dump({'result': result, 'ms': ms}, f)
+        pickle.dump({
+            'result': result, 'ms': ms,
+            'settings': {
+                'seed': seed, 'n_words': n_words, 'n_tries': n_tries,
+                'sequential': sequential, 'threshold': threshold, 'confidence': confidence, 'bound': bound,
+            },
+        }, f)
 
     plt.figure(figsize=(10, 6.6))
 
@@ -136,7 +222,7 @@ def main():
     plt.xlabel('Word length')
 
     plt.tight_layout()
-    plt.savefig(f'../images/linear_{key}_{rand_key}.pdf')
+    plt.savefig(f'../images/linear_{key}_{seed}.pdf')
 
 
 if __name__ == '__main__':
@@ -3,6 +3,8 @@ from time import time
 import numpy as np
 
 from random_automata.automaton import shifted_permutation_automaton
+from random_automata.experiments.runner import new_seed
+from random_automata.words import random_pair
 
 """
 In this module we compute the success of the automaton of given constant size.
@@ -10,36 +12,21 @@ Given number of tries, for each we generate a word pair of length `word_len`
 with `n_changes` differences and an automaton of size `automaton_size`. We increase the number of success tries
 if there is at least one state starting in which the automaton will distinguish the words.
 
-The output of the script is one number, printed on the standard output.
+The output of the script is one number, printed on the standard output (together with the seed reproducing it).
 """
 
 
-def random_pair(m, n_changes):
-
-    x = np.random.randint(2, size=m)
-    y = x.copy()
-
-    for i in np.random.choice(m, size=n_changes, replace=False):
-        y[i] = 1 - y[i]
-
-    return x, y
-
-
-def run_experiment(automaton, size, word_len, n_tries, n_changes):
+def run_experiment(automaton, size, word_len, n_tries, n_changes, seed=None):
 
+    rng = np.random.default_rng(seed)
     success = 0
 
     for _ in range(n_tries):
-        x, y = random_pair(word_len, n_changes)
-        M = automaton(size)
-
-        for s in M.states:
-            q_x = M.process(x, q=s)
-            q_y = M.process(y, q=s)
+        x, y = random_pair(word_len, n_changes, rng)
+        M = automaton(size, rng)
 
-            if q_x != q_y:
-                success += 1
-                break
+        if np.any(M.transformation(x) != M.transformation(y)):
+            success += 1
 
     return success
 
@@ -51,15 +38,16 @@ def main():
     n_tries = 1_000_000
     word_len = 1_000
     n_changes = word_len // 10
+    seed = new_seed()
 
     success = run_experiment(
         shifted_permutation_automaton,
-        size=automaton_size, word_len=word_len, n_tries=n_tries, n_changes=n_changes
+        size=automaton_size, word_len=word_len, n_tries=n_tries, n_changes=n_changes, seed=seed
     )
 
     print(f'Shifted permutation automaton of size {automaton_size} '
           f'was successful {success} of {n_tries} tries ({success * 100 / n_tries:.2f}%) '
-          f'on words of length {word_len} with {n_changes} differences.')
+          f'on words of length {word_len} with {n_changes} differences (seed {seed}).')
 
 
 if __name__ == '__main__':
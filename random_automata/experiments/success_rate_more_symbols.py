@@ -1,4 +1,5 @@
 import math
+import os
 import pickle
 from pathlib import Path
 from time import time
@@ -6,10 +7,9 @@ from time import time
 import numpy as np
 import matplotlib.pyplot as plt
 
-from random_automata.automaton import (
-    permutation_automaton, random_automaton,
-    shifted_permutation_automaton
-)
+from random_automata.batch import permutation_tables, random_tables, shifted_permutation_tables
+from random_automata.experiments.runner import ChainFastPath, new_seed, run_experiments, separated_by_final_state
+from random_automata.words import random_pairs
 
 """
 In this module we compare success rate of different automata on word pairs with more than one symbol difference.
@@ -21,44 +21,24 @@ count successful tries - when words from the pair finish in different states.
 
 For each `n` (automaton size) we compute overall success ratio and plot it for different number of changes. 
 Results of different automata are plotted in separate figures.
+All automata types, numbers of changes, sizes and words are evaluated in one process pool (see `runner.py`).
+With `common` random numbers, all types are evaluated on the same pairs with coupled automata,
+so the differences between them can be estimated with far fewer tries.
+Optionally (`markov`), random automata of larger sizes are not sampled, but their expected success is computed
+(see `markov.py`).
 
-We store the results together with settings of the experiment in `data/res_multiple_{m}_{random_suffix}.pickle` 
+We store the results together with settings of the experiment in `data/res_multiple_{m}_{seed}.pickle` 
 for reproducibility. We save the resulting graphs as 
-`images/experiment_m_{m}_{automata_type}_{random_suffix}.pdf` with the same suffix as corresponding data.
+`images/experiment_m_{m}_{automata_type}_{seed}.pdf` with the same seed as corresponding data.
 """
 
 
-def random_pair(m, n_changes):
+def run_experiment(automaton, word_len, ns, n_words, n_tries, n_changes, processes=None, seed=None):
 
-    x = np.random.randint(2, size=m)
-    y = x.copy()
+    rng = np.random.default_rng(seed)
+    experiments = {None: (automaton, *random_pairs(word_len, n_changes, n_words, rng))}
 
-    for i in np.random.choice(m, size=n_changes, replace=False):
-        y[i] = 1 - y[i]
-
-    return x, y
-
-
-def run_experiment(automaton, word_len, ns, n_words, n_tries, n_changes):
-
-    results = np.zeros((len(ns), n_words))
-
-    for i in range(n_words):
-        ttt = time()
-
-        x, y = random_pair(word_len, n_changes)
-
-        for j, n in enumerate(ns):
-            for _ in range(n_tries):
-                M = automaton(n)
-                q_x = M.process(x)
-                q_y = M.process(y)
-
-                results[j, i] += int(q_x != q_y)
-
-        print(f'{i}th word completed in {(time() - ttt):.2f}s')
-
-    return results
+    return run_experiments(separated_by_final_state, experiments, word_len, ns, n_tries, processes, seed=seed)[None]
 
 
 def plot_results(results, ns, n_words, n_tries, n_changes, style):
@@ -79,6 +59,14 @@ def main():
     n_ns = 50
     n_changes = [1, 2, 3, 5, 10, 50, 100, 500, 1000]
 
+    # evaluate all automata types on the same pairs with common random numbers
+    common = True
+
+    # compute random automata of sizes from `markov_min_n` by the chain from `markov.py` instead of sampling,
+    # below n = 1000 the chain is biased by more than the sampling error of the plotted ratios
+    markov = False
+    markov_min_n = 1000
+
     ns = np.geomspace(1, m, num=n_ns, dtype=int)
     ns = sorted(set(ns))
 
@@ -89,33 +77,46 @@ def main():
         'n': m,
     }
 
+    seed = new_seed()
+    rng = np.random.default_rng(seed)
+
     res = {
         'settings': {
+            'seed': seed,
             'm': m,
             'n_words': n_words,
             'n_tries': n_tries,
             'n_ns': n_ns,
             'n_changes': n_changes,
+            'common': common,
+            'markov': markov,
+            'markov_min_n': markov_min_n,
+            # sizes where results of random automata are computed by the chain, not sampled
+            'markov_ns': [int(n) for n in ns if markov and n >= markov_min_n],
         },
-        'permutation': [],
-        'random': [],
-        'shifted_permutation': [],
     }
 
+    automata = {
+        'permutation': permutation_tables,
+        'random': random_tables,
+        'shifted_permutation': shifted_permutation_tables,
+    }
+    experiments = {}
     for n_change in n_changes:
-        print(f'Start `Permutation automaton` experiment ({n_change} changes)')
-        res['permutation'].append(run_experiment(permutation_automaton, m, ns, n_words, n_tries, n_change))
+        pairs = random_pairs(m, n_change, n_words, rng)
+        for key, automaton in automata.items():
+            experiments[key, n_change] = (automaton, *(pairs if common else random_pairs(m, n_change, n_words, rng)))
 
-        print(f'Start `Random automaton` experiment ({n_change} changes)')
-        res['random'].append(run_experiment(random_automaton, m, ns, n_words, n_tries, n_change))
+    print('Start experiments')
+    results = run_experiments(
+        ChainFastPath(markov_min_n) if markov else separated_by_final_state,
+        experiments, m, ns, n_tries, processes=os.cpu_count(), seed=seed, common=common
+    )
 
-        print(f'Start `Shifted permutation automaton` experiment ({n_change} changes)')
-        res['shifted_permutation'].append(
-            run_experiment(shifted_permutation_automaton, m, ns, n_words, n_tries, n_change)
-        )
+    for key in automata:
+        res[key] = [results[key, n_change] for n_change in n_changes]
 
-    rand_key = np.random.randint(10000)
-    path = Path(f'../data/res_multiple_{m}_{rand_key}.pickle')
+    path = Path(f'../data/res_multiple_{m}_{seed}.pickle')
     with open(path, 'wb') as f:
         pickle.dump(res, f)
 
@@ -141,7 +142,7 @@ def main():
         plt.xlabel('Size of automaton [log]')
 
         plt.tight_layout()
-        plt.savefig(f'../images/experiment_m_{m}_{key}_{rand_key}.pdf')
+        plt.savefig(f'../images/experiment_m_{m}_{key}_{seed}.pdf')
 
     plt.show()
 
@@ -1,4 +1,5 @@
 import math
+import os
 import pickle
 from pathlib import Path
 from time import time
@@ -6,7 +7,9 @@ from time import time
 import numpy as np
 import matplotlib.pyplot as plt
 
-from random_automata.automaton import permutation_automaton, random_automaton, shifted_permutation_automaton
+from random_automata.batch import permutation_tables, random_tables, shifted_permutation_tables
+from random_automata.experiments.runner import ChainFastPath, new_seed, run_experiments, separated_by_final_state
+from random_automata.words import random_pairs
 
 """
 In this module we compare success rate of different automata types automata (random, permutation, shifted permutation). 
@@ -20,43 +23,24 @@ For each `n` (automaton size) we compute
 - min success ratio (minimal ratio of successful tries over all tried word pairs)
 - max success ratio (maximal ratio of successful tries over all tried word pairs)
 
-We store the results together with settings of the experiment in `data/res_{m}_{random_suffix}.pickle` 
+All automata types, sizes and words are evaluated in one process pool (see `runner.py`).
+With `common` random numbers, all types are evaluated on the same pairs with coupled automata,
+so the differences between them can be estimated with far fewer tries.
+Optionally (`markov`), random automata of larger sizes are not sampled, but their expected success is computed
+(see `markov.py`).
+
+We store the results together with settings of the experiment in `data/res_{m}_{seed}.pickle` 
 for reproducibility. We plot computed statistics and save the resulting graph as 
-`images/experiment_m_{m}_{random_suffix}.pdf` with the same suffix as corresponding data.
+`images/experiment_m_{m}_{seed}.pdf` with the same seed as corresponding data.
 """
 
 
-def random_pair(m):
-
-    x = np.random.randint(2, size=m)
-    y = x.copy()
-
-    i = np.random.randint(m)
-    y[i] = 1 - y[i]
-
-    return x, y
-
-
-def run_experiment(automaton, word_len, ns, n_words, n_tries):
-
-    results = np.zeros((len(ns), n_words))
-
-    for i in range(n_words):
-        ttt = time()
-
-        x, y = random_pair(word_len)
+def run_experiment(automaton, word_len, ns, n_words, n_tries, processes=None, seed=None):
 
-        for j, n in enumerate(ns):
-            for _ in range(n_tries):
-                M = automaton(n)
-                q_x = M.process(x)
-                q_y = M.process(y)
+    rng = np.random.default_rng(seed)
+    experiments = {None: (automaton, *random_pairs(word_len, 1, n_words, rng))}
 
-                results[j, i] += int(q_x != q_y)
-
-        print(f'{i}th word completed in {(time() - ttt):.2f}s')
-
-    return results
+    return run_experiments(separated_by_final_state, experiments, word_len, ns, n_tries, processes, seed=seed)[None]
 
 
 def plot_results(results, ns, n_words, n_tries, title, style):
@@ -79,6 +63,14 @@ def main():
     n_tries = 1000
     n_ns = 100
 
+    # evaluate all automata types on the same pairs with common random numbers
+    common = True
+
+    # compute random automata of sizes from `markov_min_n` by the chain from `markov.py` instead of sampling,
+    # below n = 1000 the chain is biased by more than the sampling error of the plotted ratios
+    markov = False
+    markov_min_n = 1000
+
     ns = np.geomspace(1, m, num=n_ns, dtype=int)
     ns = sorted(set(ns))
 
@@ -89,26 +81,42 @@ def main():
         'n': m,
     }
 
+    seed = new_seed()
+    rng = np.random.default_rng(seed)
+
     res = {
         'settings': {
+            'seed': seed,
             'm': m,
             'n_words': n_words,
             'n_tries': n_tries,
             'n_ns': n_ns,
+            'common': common,
+            'markov': markov,
+            'markov_min_n': markov_min_n,
+            # sizes where results of random automata are computed by the chain, not sampled
+            'markov_ns': [int(n) for n in ns if markov and n >= markov_min_n],
         }
     }
 
-    print('Start `Shifted permutation automaton` experiment')
-    res['shifted_permutation'] = run_experiment(shifted_permutation_automaton, m, ns, n_words, n_tries)
-
-    print('Start `Permutation automaton` experiment')
-    res['permutation'] = run_experiment(permutation_automaton, m, ns, n_words, n_tries)
+    automata = {
+        'shifted_permutation': shifted_permutation_tables,
+        'permutation': permutation_tables,
+        'random': random_tables,
+    }
+    pairs = random_pairs(m, 1, n_words, rng)
+    experiments = {
+        key: (automaton, *(pairs if common else random_pairs(m, 1, n_words, rng)))
+        for key, automaton in automata.items()
+    }
 
-    print('Start `Random automaton` experiment')
-    res['random'] = run_experiment(random_automaton, m, ns, n_words, n_tries)
+    print('Start experiments')
+    res.update(run_experiments(
+        ChainFastPath(markov_min_n) if markov else separated_by_final_state,
+        experiments, m, ns, n_tries, processes=os.cpu_count(), seed=seed, common=common
+    ))
 
-    suffix = np.random.randint(10000)
-    path = Path(f'../data/res_{m}_{suffix}.pickle')
+    path = Path(f'../data/res_{m}_{seed}.pickle')
     with open(path, 'wb') as f:
         pickle.dump(res, f)
 
@@ -132,7 +140,7 @@ def main():
     plt.xlabel('Size of automaton [log]')
 
     plt.tight_layout()
-    plt.savefig(f'../images/experiment_m_{m}_{suffix}.pdf')
+    plt.savefig(f'../images/experiment_m_{m}_{seed}.pdf')
     plt.show()
 
 
@@ -0,0 +1,76 @@
+import math
+from statistics import NormalDist
+
+"""
+This module provides confidence bounds for success rates estimated by sampling
+and a sequential test which decides whether the rate is above given threshold.
+The test is meant to be checked repeatedly while new samples arrive -
+it stops sampling as soon as the confidence interval lies entirely on one side of the threshold.
+Looking at a fixed-level interval after every batch would make errors more likely with every look,
+so a test with at most `looks` looks checks every one of them at `per_look_confidence`
+and all of them hold together with the given confidence (union bound).
+"""
+
+
+def wilson_interval(successes, trials, confidence=0.99):
+
+    if not trials:
+        return 0., 1.
+
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    p = successes / trials
+
+    denominator = 1 + z ** 2 / trials
+    center = (p + z ** 2 / (2 * trials)) / denominator
+    margin = z / denominator * math.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2))
+
+    return max(0., center - margin), min(1., center + margin)
+
+
+def clopper_pearson_interval(successes, trials, confidence=0.99):
+
+    if not trials:
+        return 0., 1.
+
+    alpha = 1 - confidence
+
+    # closed forms for the border cases, which are the most common ones in our experiments
+    if successes == trials:
+        return (alpha / 2) ** (1 / trials), 1.
+    if successes == 0:
+        return 0., 1 - (alpha / 2) ** (1 / trials)
+
+    from scipy.stats import beta
+
+    low = beta.ppf(alpha / 2, successes, trials - successes + 1)
+    high = beta.ppf(1 - alpha / 2, successes + 1, trials - successes)
+
+    return float(low), float(high)
+
+
+BOUNDS = {
+    'wilson': wilson_interval,
+    'clopper_pearson': clopper_pearson_interval,
+}
+
+
+def per_look_confidence(confidence, looks):
+    """
+    Confidence of each of `looks` intervals, so that all of them hold at once with `confidence`.
+    """
+    return 1 - (1 - confidence) / looks
+
+
+def resolve(successes, trials, threshold, confidence=0.99, bound='wilson'):
+    """
+    Decide if success rate is at least `threshold`.
+    Returns True or False if the decision is statistically resolved with given confidence, None otherwise.
+    """
+    low, high = BOUNDS[bound](successes, trials, confidence)
+
+    if low >= threshold:
+        return True
+    if high < threshold:
+        return False
+
+    return None
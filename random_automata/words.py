@@ -0,0 +1,89 @@
+import numpy as np
+
+"""
+This module generates random binary words and word pairs used in the experiments.
+Words are stored packed, 8 symbols per byte (`np.packbits` layout: first symbol is the most significant bit),
+so a batch of words of length `m` is a uint8 array of shape (size, ceil(m / 8)).
+A pair (x, y) with `n_changes` differences is created as y = x ^ mask, where mask has exactly `n_changes` set bits.
+Automata process unpacked words, which are produced by `unpack`.
+Generators draw from the given `numpy.random.Generator` (or a fresh one).
+"""
+
+
+# maximal number of positions drawn at once by `flip_masks`
+CHUNK = 1 << 16
+
+
+def n_bytes(m):
+
+    return (m + 7) // 8
+
+
+def random_words(m, size, rng=None):
+
+    rng = np.random.default_rng(rng)
+    words = rng.integers(256, size=(size, n_bytes(m)), dtype=np.uint8)
+
+    # clear the padding after the last symbol, so that packed words can be compared directly
+    if m % 8:
+        words[:, -1] &= np.uint8((0xFF << (8 - m % 8)) & 0xFF)
+
+    return words
+
+
+def flip_masks(m, n_changes, size, rng=None):
+    """
+    Generate `size` packed masks, each with `n_changes` distinct positions out of `m` set to 1.
+    Positions of every mask are a uniformly random choice without replacement and their bits are set
+    directly in the packed masks, in chunks of rows holding at most `CHUNK` positions.
+    """
+    rng = np.random.default_rng(rng)
+    masks = np.zeros((size, n_bytes(m)), dtype=np.uint8)
+
+    if not n_changes:
+        return masks
+
+    rows = max(1, CHUNK // n_changes)
+    for start in range(0, size, rows):
+        chunk = range(start, min(start + rows, size))
+        positions = np.array([rng.choice(m, n_changes, replace=False) for _ in chunk])
+
+        # position p is bit 7 - p % 8 of byte p // 8, positions in a row are distinct, so bits are set only once
+        np.bitwise_or.at(
+            masks, (np.array(chunk)[:, None], positions >> 3), (0x80 >> (positions & 7)).astype(np.uint8)
+        )
+
+    return masks
+
+
+def random_pairs(m, n_changes, size, rng=None):
+    """
+    Generate `size` packed pairs of words of length `m` which differ in exactly `n_changes` positions.
+    """
+    rng = np.random.default_rng(rng)
+    x = random_words(m, size, rng)
+    y = x ^ flip_masks(m, n_changes, size, rng)
+
+    return x, y
+
+
+def unpack(words, m):
+
+    return np.unpackbits(words, axis=-1, count=m)
+
+
+def bit(words, i):
+
+    return (words[..., i >> 3] >> (7 - (i & 7))) & 1
+
+
+def differences(x, y, m):
+
+    return np.flatnonzero(unpack(x ^ y, m))
+
+
+def random_pair(m, n_changes, rng=None):
+
+    x, y = random_pairs(m, n_changes, 1, rng)
+
+    return unpack(x[0], m), unpack(y[0], m)